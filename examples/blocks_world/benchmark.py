@@ -0,0 +1,84 @@
+"""
+Timing comparison for the ways Pyhop can give operators their states:
+deep copies, copy-on-write states, in-place changes with an undo trail, and
+fixed-schema states (see pyhop/schema.py), which are copied as one list.
+Run it from the top of the source tree in the same way as run1.py:
+    python examples/blocks_world/benchmark.py
+"""
+from __future__ import print_function
+import random
+import time
+
+from pyhop import hop
+from pyhop.schema import state_schema
+
+import operators
+import methods1
+
+
+def towers(n,height,seed=0):
+    """
+    Return a state with n blocks stacked at random into towers of the
+    given height, and the list of towers (each listed bottom to top).
+    """
+    blocks = list(range(1,n+1))
+    random.Random(seed).shuffle(blocks)
+    state = hop.State('towers{}'.format(n))
+    state.pos = {}
+    state.clear = {}
+    state.holding = False
+    stacks = [blocks[i:i+height] for i in range(0,n,height)]
+    for tower in stacks:
+        below = 'table'
+        for b in tower:
+            state.pos[b] = below
+            state.clear[b] = True
+            if below != 'table':
+                state.clear[below] = False
+            below = b
+    return state, stacks
+
+def unstack_all(stacks):
+    """A list of primitive tasks that puts every block on the table."""
+    tasks = []
+    for tower in stacks:
+        for i in range(len(tower)-1,0,-1):
+            tasks += [('unstack',tower[i],tower[i-1]), ('putdown',tower[i])]
+    return tasks
+
+def schema_state(state):
+    """The same state as a fixed-schema state."""
+    Blocks = state_schema('Blocks',objects=state.pos,tables=['pos','clear'],
+                          variables=['holding'])
+    new = Blocks(state.__name__)
+    for b in state.pos:
+        new.pos[b] = state.pos[b]
+        new.clear[b] = state.clear[b]
+    new.holding = state.holding
+    return new
+
+def timed(state,tasks,**options):
+    start = time.time()
+    result = hop.plan(state,tasks,hop.get_operators(),hop.get_methods(),
+                      **options)
+    return result, time.time() - start
+
+
+print('{:<28}{:>8}{:>12}{:>12}{:>12}{:>12}'.format(
+    'problem','actions','deepcopy','cow','in place','schema'))
+for n in (100, 250, 500):
+    state, stacks = towers(n,10)
+    problems = [('unstack_all, {} blocks'.format(n), unstack_all(stacks))]
+    if n <= 100:
+        goal = hop.Goal('goal')
+        goal.pos = {b:'table' for b in state.pos}
+        problems.append(
+            ('move_blocks, {} blocks'.format(n), [('move_blocks',goal)]))
+    for (name,tasks) in problems:
+        plan1, t1 = timed(state,tasks,copy_on_write=False)
+        plan2, t2 = timed(state,tasks,copy_on_write=True)
+        plan3, t3 = timed(state,tasks,in_place=True)
+        plan4, t4 = timed(schema_state(state),tasks)
+        assert plan1 == plan2 == plan3 == plan4
+        print('{:<28}{:>8}{:>11.3f}s{:>11.3f}s{:>11.3f}s{:>11.3f}s'.format(
+            name,len(plan1),t1,t2,t3,t4))
@@ -6,17 +6,18 @@ This file should work correctly in both Python 2.7 and Python 3.2.
 from pyhop import helpers, hop
 
 
-def status(b1,state,goal,done_state):
+def status(b1,state,goal,done_state,done=None):
     """
-    A helper function used in the methods' preconditions.
+    A helper function used in the methods' preconditions. done is None,
+    or a memo for helpers.is_done to share among calls on the same state.
     """
-    if helpers.is_done(b1,state,goal,done_state):
+    if helpers.is_done(b1,state,goal,done_state,done):
         return 'done'
     elif not state.clear[b1]:
         return 'inaccessible'
     elif not (b1 in goal.pos) or goal.pos[b1] == done_state:
         return 'move-to-table'
-    elif (helpers.is_done(goal.pos[b1],state,goal,done_state) and
+    elif (helpers.is_done(goal.pos[b1],state,goal,done_state,done) and
           state.clear[goal.pos[b1]]):
         return 'move-to-block'
     else:
@@ -41,22 +42,32 @@ def moveb_m(state,goal):
     block that needs to be moved and can be moved to the table, then
     do so and call move_blocks recursively. Otherwise, no blocks need
     to be moved.
+    The blocks are looked at in a single pass, which skips the ones whose
+    status can only be 'done' or 'inaccessible' and shares the work of
+    finding which blocks are done, so the method takes time linear in the
+    number of blocks.
     """
-    for b1 in helpers.all(state):
-        s = status(b1,state,goal,'table')
+    done = {}
+    waiting = None
+    for (b1,clear) in state.clear.items():
+        if not clear:
+            continue
+        if state.pos[b1] == 'table' and goal.pos.get(b1,'table') == 'table':
+            # done, and by far the commonest case once blocks are moving
+            continue
+        s = status(b1,state,goal,'table',done)
         if s == 'move-to-table':
             return [('move_one',b1,'table'),('move_blocks',goal)]
         elif s == 'move-to-block':
             return [('move_one',b1,goal.pos[b1]), ('move_blocks',goal)]
-        else:
-            continue
+        elif (s == 'waiting' and waiting is None and
+              state.pos[b1] != 'table'):
+            waiting = b1
     #
-    # if we get here, no blocks can be moved to their final locations
-    b1 = helpers.find_if(
-        lambda x: status(x,state,goal,'table') == 'waiting',
-        helpers.all(state))
-    if b1 != None:
-        return [('move_one',b1,'table'), ('move_blocks',goal)]
+    # if we get here, no blocks can be moved to their final locations;
+    # a waiting block already on the table would just be put back there
+    if waiting is not None:
+        return [('move_one',waiting,'table'), ('move_blocks',goal)]
     #
     # if we get here, there are no blocks that need moving
     return []
@@ -0,0 +1,43 @@
+"""
+Planning inside an asyncio event loop.
+
+hop.plan runs to the end once it starts, so a long search in a coroutine
+holds up every other task on the loop. The plan coroutine here does the
+same search, but gives control back to the loop after every pause_every
+search nodes, so other tasks (including other searches) take turns with
+it:
+
+    result = await aio.plan(state,tasks,operators,methods,timeout=2.0)
+
+Cancelling the task that awaits it stops the search at its next pause, and
+if timeout is given, the search raises asyncio.TimeoutError once it has
+run for that many seconds. Searches that run at the same time should not
+share a failure cache or a stats object unless their results may mix.
+
+This module needs Python 3.5 or later.
+"""
+import asyncio
+
+from pyhop.hop import _plan_steps
+
+
+async def plan(state,tasks,operators,methods=None,verbose=0,copy_on_write=True,
+               in_place=False,stats=None,tracer=None,failure_cache=None,
+               max_nodes=None,max_depth=None,pause_every=1000,
+               timeout=None,loop_check=False):
+    """
+    Like hop.plan, but let other tasks on the event loop run after every
+    pause_every search nodes, and raise asyncio.TimeoutError if the search
+    takes longer than timeout seconds, if timeout is given.
+    """
+    loop = asyncio.get_event_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    for result in _plan_steps(state,tasks,operators,methods,verbose,
+                              copy_on_write,in_place,stats,tracer,
+                              failure_cache,max_nodes,max_depth,None,
+                              pause_every,loop_check):
+        if result is not None:
+            return result
+        if deadline is not None and loop.time() >= deadline:
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(0)
@@ -0,0 +1,203 @@
+"""
+NumPy-backed state variables for numeric domains.
+
+In simple_travel.py, cash and owe are dicts from agents to numbers, and
+dist is a dict of dicts from pairs of locations to numbers. With thousands
+of agents and locations, copying such a state for every operator is slow,
+and a question such as "which agents have at least rate in cash?" takes a
+Python loop. An ArrayVar holds the same numbers in a NumPy array, with a
+dict for each axis from labels (agents, locations) to indices:
+
+    state.cash = ArrayVar([agents],[20,35,...])
+    state.dist = ArrayVar.from_dict({'home':{'park':8}, 'park':{'home':8}})
+
+The operators and methods read and write it just as they would the dicts
+(state.cash['me'], state.dist['home']['park'], or state.dist['home','park']),
+and ask bulk questions through the array itself:
+
+    rich = state.cash.where(state.cash.array >= rate)
+
+A State can hold ArrayVars alongside its other variables. Copying one
+copies its array in a single block, and pyhop.fingerprint hashes the
+array's bytes, so an ArrayVar only equals another ArrayVar, not the dict
+with the same entries. Every label on an axis has an entry, so the matrix
+that from_dict makes of a dict of dicts fills the pairs that aren't in it
+with fill. When planning in place, the writes must be made through
+ArrayVar[key] = val, not to the array directly, so that they can be
+undone.
+
+This module needs NumPy, which Pyhop doesn't otherwise require.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+class ArrayVar(Mapping):
+    """
+    A state variable whose values are the elements of the NumPy array
+    array. axes is a list with a sequence of labels for each dimension,
+    and data is anything numpy.array accepts with the right shape, or a
+    single value for every element.
+    Indexing with a label for each dimension gets or sets an element as a
+    Python number; indexing a variable of two or more dimensions with a
+    single label gives the ArrayVar for that row, which shares its array.
+    """
+    __slots__ = ('array','_indexes','_labels','_trail')
+
+    def __init__(self,axes,data=0,dtype=None):
+        if numpy is None:
+            raise ImportError('pyhop.arrays.ArrayVar needs NumPy')
+        self._labels = tuple(list(labels) for labels in axes)
+        self._indexes = tuple({label:i for (i,label) in enumerate(labels)}
+                              for labels in self._labels)
+        shape = tuple(len(labels) for labels in self._labels)
+        array = numpy.array(data,dtype=dtype)
+        if array.shape != shape:
+            array = numpy.broadcast_to(array,shape).copy()
+        self.array = array
+        self._trail = None
+
+    @classmethod
+    def from_dict(cls,d,fill=0,dtype=None):
+        """
+        Return an ArrayVar with the entries of d: a vector if its values are
+        numbers, or a matrix if they are dicts, whose rows and columns are
+        labelled by all of the keys of d and of its values, and whose other
+        elements are fill.
+        """
+        if not any(isinstance(val,dict) for val in d.values()):
+            return cls([list(d)],[d[key] for key in d],dtype)
+        labels = list(d)
+        seen = set(labels)
+        for row in d.values():
+            for key in row:
+                if key not in seen:
+                    seen.add(key)
+                    labels.append(key)
+        new = cls([labels,labels],fill,dtype)
+        for (x,row) in d.items():
+            for (y,val) in row.items():
+                new.array[new._indexes[0][x],new._indexes[1][y]] = val
+        return new
+
+    def _view(self,array,indexes,labels):
+        """Return an ArrayVar for a part of self.array."""
+        new = ArrayVar.__new__(ArrayVar)
+        new.array = array
+        new._indexes = indexes
+        new._labels = labels
+        new._trail = self._trail
+        return new
+
+    def _position(self,key):
+        """Return the index in self.array of the element for key."""
+        if len(self._indexes) == 1:
+            return self._indexes[0][key]
+        if type(key) is not tuple or len(key) != len(self._indexes):
+            raise TypeError('{!r} is not a key for one element'.format(key))
+        return tuple(index[k] for (index,k) in zip(self._indexes,key))
+
+    def __getitem__(self,key):
+        indexes = self._indexes
+        if len(indexes) == 1:
+            return self.array.item(indexes[0][key])
+        if type(key) is tuple and len(key) == len(indexes):
+            return self.array.item(self._position(key))
+        return self._view(self.array[indexes[0][key]],indexes[1:],
+                          self._labels[1:])
+
+    def __setitem__(self,key,val):
+        i = self._position(key)
+        if self._trail is not None:
+            self._trail.append((self,i,self.array.item(i)))
+        self.array[i] = val
+
+    def _put(self,i,val):
+        """Set the element at index i, for Trail.undo."""
+        self.array[i] = val
+
+    def __contains__(self,key):
+        return key in self._indexes[0]
+
+    def __iter__(self):
+        return iter(self._labels[0])
+
+    def __len__(self):
+        return len(self._labels[0])
+
+    def where(self,mask):
+        """
+        Return the keys of the elements for which the boolean array mask
+        (usually a comparison of self.array with something) is true:
+        labels for a vector, and tuples of labels otherwise.
+        """
+        positions = numpy.nonzero(mask)
+        if len(positions) == 1:
+            labels = self._labels[0]
+            return [labels[i] for i in positions[0]]
+        return [tuple(labels[i] for (labels,i) in zip(self._labels,pos))
+                for pos in zip(*positions)]
+
+    def fingerprint(self):
+        """Return a hash value for the labels and elements."""
+        array = self.array
+        if array.dtype.kind in 'fc':
+            # -0.0 == 0.0, but their bytes differ
+            array = array + 0
+        return hash((tuple(map(tuple,self._labels)),str(array.dtype),
+                     array.tobytes()))
+
+    def __eq__(self,other):
+        """
+        ArrayVars are equal if they have the same labels and dtype and equal
+        elements, as their fingerprints are. An ArrayVar is never equal to
+        a mapping of another kind, since its fingerprint is made from its
+        array rather than from its entries.
+        """
+        if not isinstance(other,ArrayVar):
+            return NotImplemented
+        return (self._labels == other._labels and
+                self.array.dtype == other.array.dtype and
+                numpy.array_equal(self.array,other.array))
+
+    def __ne__(self,other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __copy__(self):
+        return self._view(self.array.copy(),self._indexes,self._labels)
+
+    def __deepcopy__(self,memo):
+        new = self.__copy__()
+        new._trail = None
+        return new
+
+    def trail_copy(self,trail):
+        """
+        Return a copy that records its writes on trail, for
+        pyhop.trail.trail_state.
+        """
+        new = self.__copy__()
+        new._trail = trail
+        return new
+
+    def __reduce__(self):
+        return (_rebuild,(self._labels,self.array))
+
+    def __repr__(self):
+        if len(self._indexes) == 1:
+            return repr(dict(zip(self._labels[0],self.array.tolist())))
+        return repr({label:self[label] for label in self._labels[0]})
+
+
+def _rebuild(axes,array):
+    return ArrayVar(axes,array,array.dtype)
@@ -0,0 +1,403 @@
+"""
+Benchmarks of the planner on generated problems.
+
+The examples that come with Pyhop are small and print their answers. This
+module makes problems of any size in two domains, plans for them with
+hop.plan, and writes what it measures as JSON lines, one line per domain,
+size and way of planning, so that the results of one version of Pyhop can
+be compared with those of another:
+
+    python -m pyhop.bench --sizes 50,100,200 --out new.jsonl
+    python -m pyhop.bench --sizes 50,100,200 --baseline old.jsonl
+    python -m pyhop.bench --domains travel --density 8
+
+The domains are:
+- 'blocks', the blocks world of examples/blocks_world, with size blocks
+  stacked at random into towers, and a goal of other random towers;
+- 'travel', a version of examples/simple_travel.py in which an agent goes
+  between two of size locations, scattered at random, in a network in
+  which each location has a road to about density others (by default, 4;
+  set it with --density). The agent walks
+  or takes a taxi along each road, trying the roads that lead closest to
+  where it is going first, so it sometimes has to back up. The tables of
+  distances are rigid (see pyhop.rigid), as they would be in a real one.
+
+Each line has the number of search nodes, nodes per second, the median,
+90th and 99th percentile and mean seconds per plan, the peak memory (in
+bytes) that Python allocated while planning, and the length of the plan.
+With --baseline, the median times are compared with those in an earlier
+file, and the exit status is 1 if any has grown by more than the
+tolerance (by default, 25%).
+"""
+from __future__ import print_function
+import argparse
+import json
+import math
+import random
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from pyhop import helpers, hop
+from pyhop.domain import compile_domain
+from pyhop.engine import BudgetExhausted
+from pyhop.rigid import Rigid
+from pyhop.stats import SearchStats, clock
+
+
+# the ways of planning that run compares, as keyword arguments for hop.plan
+MODES = {
+    'cow': {},
+    'deepcopy': {'copy_on_write':False},
+    'in_place': {'in_place':True},
+}
+
+
+############################################################
+# The blocks world
+
+def pickup(state,b):
+    if (state.pos[b] == 'table' and state.clear[b] == True
+        and state.holding == False):
+        state.pos[b] = 'hand'
+        state.clear[b] = False
+        state.holding = b
+        return state
+    else: return False
+
+def unstack(state,b,c):
+    if (state.pos[b] == c and c != 'table' and state.clear[b] == True
+        and state.holding == False):
+        state.pos[b] = 'hand'
+        state.clear[b] = False
+        state.holding = b
+        state.clear[c] = True
+        return state
+    else: return False
+
+def putdown(state,b):
+    if state.pos[b] == 'hand':
+        state.pos[b] = 'table'
+        state.clear[b] = True
+        state.holding = False
+        return state
+    else: return False
+
+def stack(state,b,c):
+    if state.pos[b] == 'hand' and state.clear[c] == True:
+        state.pos[b] = c
+        state.clear[b] = True
+        state.holding = False
+        state.clear[c] = False
+        return state
+    else: return False
+
+def moveb_m(state,goal):
+    """
+    The block-stacking algorithm of examples/blocks_world/methods1.py:
+    move a block to its final position if one can be, otherwise move a
+    block that is in the way to the table.
+    """
+    done = {}
+    waiting = None
+    for (b1,clear) in state.clear.items():
+        if not clear:
+            continue
+        if helpers.is_done(b1,state,goal,'table',done):
+            continue
+        dest = goal.pos.get(b1,'table')
+        if dest == 'table':
+            return [('move_one',b1,'table'),('move_blocks',goal)]
+        if (helpers.is_done(dest,state,goal,'table',done)
+            and state.clear[dest]):
+            return [('move_one',b1,dest),('move_blocks',goal)]
+        if waiting is None and state.pos[b1] != 'table':
+            waiting = b1
+    if waiting is not None:
+        return [('move_one',waiting,'table'),('move_blocks',goal)]
+    return []
+
+def move1(state,b1,dest):
+    return [('get',b1),('put',b1,dest)]
+
+def get_m(state,b1):
+    if state.clear[b1]:
+        if state.pos[b1] == 'table':
+            return [('pickup',b1)]
+        return [('unstack',b1,state.pos[b1])]
+    return False
+
+def put_m(state,b1,b2):
+    if state.holding == b1:
+        if b2 == 'table':
+            return [('putdown',b1)]
+        return [('stack',b1,b2)]
+    return False
+
+BLOCKS = compile_domain(
+    {op.__name__:op for op in (pickup,unstack,putdown,stack)},
+    {'move_blocks':[moveb_m], 'move_one':[move1], 'get':[get_m],
+     'put':[put_m]})
+
+def _random_towers(blocks,rng):
+    """Return a dict from each block to what it is on, for random towers."""
+    blocks = list(blocks)
+    rng.shuffle(blocks)
+    pos = {}
+    below = 'table'
+    for b in blocks:
+        pos[b] = below
+        # start a new tower about one time in four
+        below = 'table' if rng.random() < 0.25 else b
+    return pos
+
+def blocks_problem(size,seed=0):
+    """
+    Return (state,tasks) for moving size blocks from random towers into
+    other random towers.
+    """
+    rng = random.Random(seed)
+    blocks = range(1,size+1)
+    state = hop.State('blocks{}'.format(size))
+    state.pos = _random_towers(blocks,rng)
+    state.clear = {b:True for b in blocks}
+    for below in state.pos.values():
+        if below != 'table':
+            state.clear[below] = False
+    state.holding = False
+    goal = hop.Goal('goal')
+    goal.pos = _random_towers(blocks,rng)
+    return (state,[('move_blocks',goal)])
+
+
+############################################################
+# Travel in a network of roads
+
+def taxi_rate(dist):
+    return (1.5 + 0.5 * dist)
+
+def walk(state,a,x,y):
+    if state.loc[a] == x:
+        state.loc[a] = y
+        state.visited[a,y] = True
+        return state
+    else: return False
+
+def call_taxi(state,a,x):
+    state.loc['taxi'] = x
+    return state
+
+def ride_taxi(state,a,x,y):
+    if state.loc['taxi']==x and state.loc[a]==x:
+        state.loc['taxi'] = y
+        state.loc[a] = y
+        state.visited[a,y] = True
+        state.owe[a] = taxi_rate(state.dist[x][y])
+        return state
+    else: return False
+
+def pay_driver(state,a):
+    if state.cash[a] >= state.owe[a]:
+        state.cash[a] = state.cash[a] - state.owe[a]
+        state.owe[a] = 0
+        return state
+    else: return False
+
+def travel_by_foot(state,a,x,y):
+    if state.dist[x].get(y,3) <= 2:
+        return [('walk',a,x,y)]
+    return False
+
+def travel_by_taxi(state,a,x,y):
+    if y in state.dist[x] and state.cash[a] >= taxi_rate(state.dist[x][y]):
+        return [('call_taxi',a,x), ('ride_taxi',a,x,y), ('pay_driver',a)]
+    return False
+
+def _via(n):
+    """
+    Return a method for going from x to y by a road to the n'th closest
+    place to y (as the crow flies) that a hasn't been to yet.
+    """
+    def travel_via(state,a,x,y):
+        if x == y:
+            return []
+        places = sorted((z for z in state.dist[x]
+                         if (a,z) not in state.visited),
+                        key=lambda z: state.crow[z][y])
+        if len(places) <= n:
+            return False
+        z = places[n]
+        return [('road',a,x,z),('travel',a,z,y)]
+    travel_via.__name__ = 'travel_via_{}'.format(n)
+    return travel_via
+
+TRAVEL = compile_domain(
+    {op.__name__:op for op in (walk,call_taxi,ride_taxi,pay_driver)},
+    {'travel':[_via(0),_via(1),_via(2)],
+     'road':[travel_by_foot,travel_by_taxi]})
+
+def travel_problem(size,density=4,seed=0):
+    """
+    Return (state,tasks) for an agent to travel between two of size places
+    scattered at random in a 10 by 10 square, each of which has roads to
+    its density nearest neighbours (and any place whose neighbour it is).
+    """
+    rng = random.Random(seed)
+    places = ['p{}'.format(i) for i in range(size)]
+    xy = {p:(rng.uniform(0,10),rng.uniform(0,10)) for p in places}
+    crow = {p:{q:math.hypot(xy[p][0]-xy[q][0],xy[p][1]-xy[q][1])
+               for q in places} for p in places}
+    dist = {p:{} for p in places}
+    for p in places:
+        nearest = sorted(places,key=crow[p].get)[1:density+1]
+        for q in nearest:
+            dist[p][q] = dist[q][p] = round(crow[p][q],1)
+    state = hop.State('travel{}'.format(size))
+    state.loc = {'me':places[0], 'taxi':places[0]}
+    state.cash = {'me':10*size}
+    state.owe = {'me':0}
+    state.visited = {('me',places[0]):True}
+    state.dist = Rigid(dist)
+    state.crow = Rigid(crow)
+    return (state,[('travel','me',places[0],places[-1])])
+
+
+DOMAINS = {
+    'blocks': (BLOCKS,blocks_problem),
+    'travel': (TRAVEL,travel_problem),
+}
+
+# the domains whose problems have a density, and its default for each
+DENSITIES = {'travel': 4}
+
+
+############################################################
+# Measuring
+
+def percentile(values,p):
+    """Return the p'th percentile of values, by linear interpolation."""
+    values = sorted(values)
+    k = (len(values)-1) * p / 100.0
+    i = int(k)
+    if i+1 >= len(values):
+        return values[-1]
+    return values[i] + (values[i+1]-values[i]) * (k-i)
+
+def run(domain_name,size,mode='cow',repeat=5,seed=0,max_nodes=None,
+        density=None):
+    """
+    Plan repeat times for the domain_name problem of the given size (and
+    density, for a domain in DENSITIES; None means its default), in the
+    way that mode names in MODES, and return a dict of the measurements.
+    """
+    (domain,make_problem) = DOMAINS[domain_name]
+    if domain_name in DENSITIES:
+        if density is None:
+            density = DENSITIES[domain_name]
+        (state,tasks) = make_problem(size,density=density,seed=seed)
+    else:
+        density = None
+        (state,tasks) = make_problem(size,seed=seed)
+    options = dict(MODES[mode],max_nodes=max_nodes)
+    # one run with statistics, to count the nodes, and one to measure the
+    # memory, since both slow the planner down; then the timed runs
+    stats = SearchStats()
+    result = hop.plan(state,tasks,domain,stats=stats,**options)
+    peak = None
+    if tracemalloc is not None and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        hop.plan(state,tasks,domain,**options)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    times = []
+    for i in range(repeat):
+        start = clock()
+        hop.plan(state,tasks,domain,**options)
+        times.append(clock() - start)
+    median = percentile(times,50)
+    # a plan may be [], which is false
+    found = result is not False and not isinstance(result,BudgetExhausted)
+    return {
+        'domain': domain_name, 'size': size, 'density': density,
+        'mode': mode, 'seed': seed, 'repeat': repeat, 'nodes': stats.nodes,
+        'nodes_per_second': stats.nodes/median if median else None,
+        'p50': median, 'p90': percentile(times,90),
+        'p99': percentile(times,99), 'mean': sum(times)/len(times),
+        'peak_memory': peak,
+        'plan_length': len(result) if found else None,
+        'found': found,
+    }
+
+def regressions(results,baseline,tolerance=0.25):
+    """
+    Return the results (dicts from run) whose median time is more than
+    tolerance (a fraction) above that of the matching result in baseline.
+    """
+    def key(r):
+        # results written before there was a density had the default one
+        density = r.get('density',DENSITIES.get(r['domain']))
+        return (r['domain'],r['size'],density,r['mode'],r['seed'])
+    before = {key(r):r for r in baseline}
+    return [r for r in results if key(r) in before and
+            r['p50'] > before[key(r)]['p50'] * (1+tolerance)]
+
+def read_results(filename):
+    """Return the results in a JSON lines file that main wrote."""
+    with open(filename) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pyhop.bench',
+        description='Time hop.plan on generated problems.')
+    parser.add_argument('--domains',default='blocks,travel',
+                        help='comma-separated: blocks, travel')
+    parser.add_argument('--sizes',default='25,50,100,200',
+                        help='comma-separated problem sizes')
+    parser.add_argument('--modes',default='cow,in_place',
+                        help='comma-separated: ' + ', '.join(sorted(MODES)))
+    parser.add_argument('--repeat',type=int,default=5,
+                        help='timed runs per problem')
+    parser.add_argument('--density',type=int,default=None,
+                        help='roads from each place in travel problems '
+                        '(default: 4)')
+    parser.add_argument('--seed',type=int,default=0)
+    parser.add_argument('--max-nodes',type=int,default=None,
+                        help='node budget for each plan')
+    parser.add_argument('--out',default=None,
+                        help='file for the results (default: stdout)')
+    parser.add_argument('--baseline',default=None,
+                        help='results file to compare the median times with')
+    parser.add_argument('--tolerance',type=float,default=0.25,
+                        help='allowed slowdown against the baseline')
+    options = parser.parse_args(args)
+    out = open(options.out,'w') if options.out else sys.stdout
+    results = []
+    try:
+        for domain_name in options.domains.split(','):
+            for size in [int(s) for s in options.sizes.split(',')]:
+                for mode in options.modes.split(','):
+                    result = run(domain_name,size,mode,options.repeat,
+                                 options.seed,options.max_nodes,
+                                 options.density)
+                    results.append(result)
+                    print(json.dumps(result,sort_keys=True),file=out)
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if options.baseline:
+        slower = regressions(results,read_results(options.baseline),
+                             options.tolerance)
+        for r in slower:
+            print('slower: {domain} size {size} {mode}: '
+                  'median {p50:.6f}s'.format(**r),file=sys.stderr)
+        return 1 if slower else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Cost-aware planning.
+
+hop.plan returns the first plan that its depth-first search finds, however
+much it costs. plan (below) looks for the cheapest one, using the same
+operators and methods, and a cost for each operator:
+
+    cost = {'walk': 0.5,
+            'ride_taxi': lambda state,a,x,y: taxi_rate(state.dist[x][y])}
+    result = best.plan(state1,[('travel','me','home','park')],
+                       operators,methods,cost=cost)
+    print(result.plan,result.cost)
+
+An operator's cost is either a number or a function of the state the
+operator is applied to and the operator's arguments, like the operator
+itself; operators that cost doesn't mention cost 1. Methods cost nothing,
+so the cost of a plan is the total cost of its actions. Costs must not be
+negative.
+
+There are two strategies:
+- 'astar' expands the search node with the least g+h first, where g is the
+  cost of the actions so far and h is heuristic(state,tasks), an estimate
+  of the cost of the tasks that are left (0 if there is no heuristic). If h
+  never overestimates, the first plan found is the cheapest.
+- 'bnb' (branch and bound) searches depth first, in the same order as
+  hop.plan, so its first plan is the one hop.plan would find; then it goes
+  on looking, skipping every node whose g+h is no less than the cost of
+  the best plan so far. It keeps little in memory, and if it runs out of
+  budget it still has the best plan it found.
+Both strategies skip a node that has the same state (by fingerprint) and
+the same tasks as one they have already reached at no greater cost. They
+take all of the alternatives of a method task at once, so a generator
+method (see pyhop.engine) is run to the end.
+
+The search stops when it runs out of max_nodes nodes or time_limit
+seconds, if those are given. The result is a CostResult, whose optimal
+attribute tells whether the plan is known to be the cheapest. Since the
+search jumps from one branch to another, the operators always get copies
+of the state (cheap ones, with copy_on_write, as in hop.plan) rather than
+changing it in place.
+"""
+import copy
+import heapq
+from collections import namedtuple
+
+from pyhop.cow import cow_state
+from pyhop.domain import Domain, compile_domain
+from pyhop.engine import (
+    BudgetExhausted, TIME_CHECK_INTERVAL, _decompositions)
+from pyhop.fingerprint import state_fingerprint
+from pyhop.helpers import from_linked, reversed_list, to_linked
+from pyhop.memo import hash_tasks
+from pyhop.stats import clock
+
+
+class CostResult(namedtuple('CostResult','plan cost optimal')):
+    """
+    The outcome of plan: plan is the cheapest plan found, False if there is
+    none, or a BudgetExhausted if the budget ran out before any was found;
+    cost is the plan's cost (None if there is no plan); and optimal is true
+    if no plan is cheaper (given an admissible heuristic).
+    """
+    __slots__ = ()
+
+
+def plan(state,tasks,operators,methods=None,cost=None,heuristic=None,
+         strategy='astar',max_nodes=None,time_limit=None,copy_on_write=True):
+    """
+    Find the cheapest plan for tasks in state, by the given strategy
+    ('astar' or 'bnb'), and return a CostResult. operators and methods are
+    as for hop.plan (operators may be a Domain or CompiledDomain, with
+    methods None). cost maps operator names to costs, and heuristic, if it
+    is given, is a function of a state and a list of tasks.
+    """
+    if isinstance(operators,Domain):
+        operators = operators.snapshot()
+    elif methods is not None:
+        operators = compile_domain(operators,methods,check=False)
+    else:
+        operators.check(tasks)
+    if strategy == 'astar':
+        search = _astar
+    elif strategy == 'bnb':
+        search = _branch_and_bound
+    else:
+        raise ValueError('unknown strategy {!r}'.format(strategy))
+    if copy_on_write:
+        state = cow_state(state)
+    expand = _Expander(operators.table,cost or {},heuristic)
+    deadline = None if time_limit is None else clock() + time_limit
+    return search(expand,(0,state,to_linked(tasks),None,
+                          hash_tasks(tasks,None,expand.arg_hashes)),
+                  max_nodes,deadline)
+
+
+class _Expander(object):
+    """
+    Makes the children of search nodes. A node is (g,state,tasks,plan,
+    hashes): the cost so far, the state, the linked lists of tasks and of
+    their hashes (see pyhop.memo.hash_tasks), and the plan as a linked
+    list with the latest action first. best maps the key of each node
+    reached to the least g it has been reached with, and arg_hashes keeps
+    the hash values of task arguments (see pyhop.memo.task_hash).
+    """
+
+    def __init__(self,table,cost,heuristic):
+        self.table = table
+        self.cost = cost
+        self.heuristic = heuristic
+        self.best = {}
+        self.arg_hashes = {}
+
+    def h(self,node):
+        if self.heuristic is None:
+            return 0
+        return self.heuristic(node[1],from_linked(node[2]))
+
+    def is_new(self,node):
+        """
+        True, and node remembered, unless the same subproblem has already
+        been reached at no greater cost.
+        """
+        key = (state_fingerprint(node[1]),node[4][0])
+        g = self.best.get(key)
+        if g is not None and g <= node[0]:
+            return False
+        self.best[key] = node[0]
+        return True
+
+    def children(self,node):
+        """Return the children of node, in the order hop.plan tries them."""
+        (g,state,tasks,plan,hashes) = node
+        (task,rest) = tasks
+        action = self.table.get(task[0])
+        if action is None:
+            return []
+        if action.__class__ is not tuple:
+            c = self.cost.get(task[0],1)
+            if callable(c):
+                c = c(state,*task[1:])
+            newstate = action(copy.deepcopy(state),*task[1:])
+            if not newstate:
+                return []
+            return [(g+c,newstate,rest,(task,plan),hashes[1])]
+        children = []
+        for (method,subtasks) in _decompositions(action,state,task[1:]):
+            if subtasks != False:
+                children.append((g,state,to_linked(subtasks,rest),plan,
+                                 hash_tasks(subtasks,hashes[1],
+                                            self.arg_hashes)))
+        return children
+
+
+def _astar(expand,root,max_nodes,deadline):
+    # Entries are (f,serial,node); serial counts down, so that of the nodes
+    # with the same f, the newest comes first, as in a depth-first search.
+    queue = [(expand.h(root),0,root)]
+    serial = 0
+    nodes = 0
+    while queue:
+        (f,_,node) = heapq.heappop(queue)
+        if node[2] is None:
+            return CostResult(reversed_list(node[3]),node[0],True)
+        nodes += 1
+        reason = _out_of_budget(nodes,max_nodes,deadline)
+        if reason is not None:
+            return CostResult(BudgetExhausted(reason),None,False)
+        for child in expand.children(node):
+            if child[2] is None or expand.is_new(child):
+                serial -= 1
+                heapq.heappush(queue,(child[0]+expand.h(child),serial,child))
+    return CostResult(False,None,True)
+
+def _branch_and_bound(expand,root,max_nodes,deadline):
+    stack = [root]
+    (best,best_cost) = (False,None)
+    nodes = 0
+    while stack:
+        node = stack.pop()
+        if best_cost is not None and node[0] + expand.h(node) >= best_cost:
+            continue
+        if node[2] is None:
+            (best,best_cost) = (reversed_list(node[3]),node[0])
+            continue
+        nodes += 1
+        reason = _out_of_budget(nodes,max_nodes,deadline)
+        if reason is not None:
+            if best is False:
+                best = BudgetExhausted(reason)
+            return CostResult(best,best_cost,False)
+        children = [child for child in expand.children(node)
+                    if child[2] is None or expand.is_new(child)]
+        children.reverse()
+        stack.extend(children)
+    return CostResult(best,best_cost,True)
+
+def _out_of_budget(nodes,max_nodes,deadline):
+    """Return 'nodes' or 'time' if that budget has run out, else None."""
+    if max_nodes is not None and nodes > max_nodes:
+        return 'nodes'
+    if (deadline is not None and nodes % TIME_CHECK_INTERVAL == 0 and
+        clock() >= deadline):
+        return 'time'
+    return None
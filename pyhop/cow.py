@@ -0,0 +1,304 @@
+"""
+Copy-on-write state variables for Pyhop.
+
+The planner has to give every operator a private copy of the current state,
+because a failed or backtracked branch must not disturb the states that are
+still on the search path. Deep-copying a whole state for that costs time
+proportional to the size of the state, even though a typical operator (such
+as the blocks-world 'pickup' or 'stack') only writes two or three entries.
+
+A CowDict is a mapping whose copies share structure with it. Copying one is
+O(1): the original's entries are frozen into a shared layer and both the
+original and the copy record their later writes in small private layers on
+top of it. Lookups walk the (short) chain of layers, and the chain is
+compacted from time to time so that the cost of a write stays proportional
+to the number of keys written rather than to the size of the dict.
+
+cow_state(state) converts the dict-valued variables of a state into
+CowDicts. plan() does this once for the initial state, after which every
+copy.deepcopy of a state in the search is cheap.
+"""
+import copy
+
+from pyhop.fingerprint import (
+    known_fingerprint, mapping_fingerprint, set_fingerprint, toggle_entry)
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+# chains longer than this are compacted on the next copy
+MAX_DEPTH = 32
+
+# marks a key deleted in a layer whose ancestors still have it
+_DELETED = object()
+_ABSENT = object()
+
+_ATOMS = (str, bytes, int, float, complex, bool, type(None), frozenset)
+_ATOM_TYPES = frozenset(_ATOMS)
+
+
+class CowDict(MutableMapping):
+    """
+    A dict-like mapping with O(1) copies that share structure.
+    Values that are dicts are converted into CowDicts too, and are
+    themselves copied the first time a copy reads them, so that writes
+    such as state.dist[x][y] = d never leak into other states. (A CowDict
+    stored as a value is copied as well, so unlike a dict it is never
+    shared between two places.) Other mutable values, such as lists and
+    sets, are deep-copied when they are stored and again the first time a
+    copy reads them, so that changing one in place, as in
+    state.bag[x].append(y), changes only that copy. The fingerprint of the
+    contents (see pyhop.fingerprint) is kept up to date with each write
+    while the values can be hashed, but not with such changes made in
+    place.
+    """
+    __slots__ = ('_data', '_parent', '_depth', '_len', '_fp', '_owner')
+
+    def __init__(self,data=()):
+        self._data = {}
+        self._parent = None
+        self._depth = 0
+        self._owner = None
+        for (k,v) in dict(data).items():
+            self._data[k] = self._adopt(k,v)
+        self._fp = known_fingerprint(self._data)
+        self._len = len(self._data)
+
+    @classmethod
+    def _layer(cls,parent):
+        layer = cls.__new__(cls)
+        layer._data = {}
+        layer._parent = parent
+        layer._depth = parent._depth + 1
+        layer._len = parent._len
+        layer._fp = parent._fp
+        layer._owner = None
+        return layer
+
+    def _adopt(self,key,val):
+        """
+        Return the value to store for key in this layer: val itself if it
+        is immutable, a CowDict of its own if val is a dict or a CowDict,
+        and otherwise a deep copy of val. Such a CowDict records that it
+        belongs to self, so that writes to it can update self's
+        fingerprint.
+        """
+        if type(val) is dict:
+            val = CowDict(val)
+        elif type(val) is CowDict:
+            val = val.copy()
+        elif type(val) in _ATOM_TYPES or _atomic(val):
+            return val
+        else:
+            return copy.deepcopy(val)
+        val._owner = (self,key)
+        return val
+
+    def _find(self,key):
+        """Look key up in the ancestors of this layer."""
+        node = self._parent
+        while node is not None:
+            val = node._data.get(key,_ABSENT)
+            if val is not _ABSENT:
+                if val is _DELETED:
+                    return _ABSENT
+                if type(val) not in _ATOM_TYPES and not _atomic(val):
+                    # the ancestor's value is shared; take a private copy
+                    val = self._data[key] = self._adopt(key,val)
+                return val
+            node = node._parent
+        return _ABSENT
+
+    def __getitem__(self,key):
+        val = self._data.get(key,_ABSENT)
+        if val is _ABSENT:
+            val = self._find(key)
+        if val is _ABSENT or val is _DELETED:
+            raise KeyError(key)
+        return val
+
+    def get(self,key,default=None):
+        val = self._data.get(key,_ABSENT)
+        if val is _ABSENT:
+            val = self._find(key)
+        if val is _ABSENT or val is _DELETED:
+            return default
+        return val
+
+    def __contains__(self,key):
+        val = self._data.get(key,_ABSENT)
+        if val is _ABSENT:
+            node = self._parent
+            while node is not None:
+                val = node._data.get(key,_ABSENT)
+                if val is not _ABSENT:
+                    break
+                node = node._parent
+        return val is not _ABSENT and val is not _DELETED
+
+    def __setitem__(self,key,val):
+        old = self.get(key,_ABSENT)
+        if old is _ABSENT:
+            if self._data.get(key) is _DELETED:
+                # re-adding moves key to the end, which layers can't express
+                self._flatten()
+            self._len += 1
+            fp = self._fp
+        else:
+            fp = toggle_entry(self._fp,key,old)
+        val = self._data[key] = self._adopt(key,val)
+        set_fingerprint(self,toggle_entry(fp,key,val))
+
+    def __delitem__(self,key):
+        old = self.get(key,_ABSENT)
+        if old is _ABSENT:
+            raise KeyError(key)
+        self._len -= 1
+        if self._parent is None:
+            del self._data[key]
+        else:
+            self._data[key] = _DELETED
+        set_fingerprint(self,toggle_entry(self._fp,key,old))
+
+    def fingerprint(self):
+        """
+        Return the fingerprint of the contents, in O(1) time unless it is
+        unknown (see pyhop.fingerprint).
+        """
+        if self._fp is None:
+            self._fp = mapping_fingerprint(self)
+        return self._fp
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        if self._parent is not None:
+            self._flatten()
+        return iter(self._data)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def copy(self):
+        """Return an independent copy of self in O(1) time."""
+        if self._data or self._parent is None:
+            if self._depth >= MAX_DEPTH:
+                self._compact()
+            frozen = CowDict.__new__(CowDict)
+            frozen._data = self._data
+            frozen._parent = self._parent
+            frozen._depth = self._depth
+            frozen._len = self._len
+            frozen._fp = self._fp
+            frozen._owner = None
+            self._data = {}
+            self._parent = frozen
+            self._depth = frozen._depth + 1
+        return CowDict._layer(self._parent)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self,memo):
+        result = memo[id(self)] = self.copy()
+        return result
+
+    def __reduce__(self):
+        return (CowDict, (dict(self.items()),))
+
+    def _chain(self):
+        """Return the layers from the root up to and including self."""
+        chain = []
+        node = self
+        while node is not None:
+            chain.append(node)
+            node = node._parent
+        chain.reverse()
+        return chain
+
+    def _flatten(self):
+        """Turn self into a root layer holding all of its entries."""
+        chain = self._chain()
+        data = dict(chain[0]._data)
+        for layer in chain[1:]:
+            for (k,v) in layer._data.items():
+                if v is _DELETED:
+                    data.pop(k,None)
+                else:
+                    data[k] = v
+        for (k,v) in data.items():
+            if self._data.get(k) is not v and not _atomic(v):
+                data[k] = self._adopt(k,v)
+        self._data = data
+        self._parent = None
+        self._depth = 0
+
+    def _compact(self):
+        """
+        Shorten the chain below self by merging its topmost layers into
+        one. A layer is merged only if it is not much bigger than the ones
+        above it, so layer sizes grow geometrically down the chain, each
+        write is merged O(log n) times, and the chain stays O(log n) long.
+        Once the merged writes are a sizeable fraction of the root, the
+        whole chain is flattened, which is amortized over those writes.
+        """
+        chain = self._chain()
+        top = len(chain) - 1
+        size = len(self._data)
+        while top > 1 and (top == len(chain) - 1
+                           or len(chain[top-1]._data) <= 2*size):
+            top -= 1
+            size += len(chain[top]._data)
+        if top == 1 and 4*size >= len(chain[0]._data):
+            self._flatten()
+            return
+        merged = {}
+        for layer in chain[top:]:
+            for (k,v) in layer._data.items():
+                if merged.get(k) is _DELETED and v is not _DELETED:
+                    # a re-added key moves to the end; see __setitem__
+                    self._flatten()
+                    return
+                merged[k] = v
+        for (k,v) in merged.items():
+            if (v is not _DELETED and self._data.get(k) is not v
+                and not _atomic(v)):
+                merged[k] = self._adopt(k,v)
+        self._data = merged
+        self._parent = chain[top-1]
+        self._depth = self._parent._depth + 1
+
+
+def _atomic(val):
+    if type(val) in _ATOM_TYPES or isinstance(val,_ATOMS):
+        return True
+    if type(val) is tuple:
+        for x in val:
+            if not _atomic(x): return False
+        return True
+    return False
+
+def _wrappable(d):
+    """True if every value in d is immutable or a wrappable dict."""
+    for val in d.values():
+        if type(val) is dict or type(val) is CowDict:
+            if not _wrappable(val): return False
+        elif not _atomic(val):
+            return False
+    return True
+
+def cow_state(state):
+    """
+    Return a copy of state in which each dict-valued variable is a CowDict.
+    Variables whose values are not dicts, or dicts that hold mutable values
+    other than dicts, are left alone and will be deep-copied as before.
+    """
+    new = copy.copy(state)
+    for (name,val) in vars(new).items():
+        if type(val) is dict and _wrappable(val):
+            setattr(new,name,CowDict(val))
+    return new
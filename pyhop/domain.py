@@ -0,0 +1,200 @@
+"""
+Compiled planning domains.
+
+The search looks up the name of every task it meets, first among the
+operators and then among the methods. compile_domain does that work once
+for a whole domain: it builds a single table from each task name to its
+operator, or to the tuple of its methods, so the search finds out what to
+do with a task with one dict lookup. It also checks the domain as it goes,
+so that mistakes show up before the search starts rather than in the
+middle of it:
+
+    domain = compile_domain(operators,methods)
+    hop.plan(state,tasks,domain)
+
+A CompiledDomain can be given to plan in place of the operators, with the
+methods left out; plan then checks the number of arguments of each of the
+top-level tasks before it searches. A compiled domain doesn't change when
+the dicts it was compiled from do, so it can be shared by many calls to
+plan.
+
+A Domain holds its own operators and methods, declared in the same way as
+with hop.declare_operators and hop.declare_methods, so that a program can
+have more than one domain at a time:
+
+    travel = Domain('travel')
+    travel.declare_operators(walk,call_taxi,ride_taxi,pay_driver)
+    travel.declare_methods('travel',travel_by_foot,travel_by_taxi)
+    hop.plan(state,tasks,travel)
+
+plan uses travel.snapshot(), the CompiledDomain for the declarations made
+so far. Declaring more operators or methods changes the Domain but not the
+snapshots it has already given out, so other threads can go on planning
+with those, and a snapshot can be sent to other processes. (hop's own
+declare_operators and declare_methods declare them in hop.default_domain.)
+"""
+import inspect
+import threading
+
+
+class CompiledDomain(object):
+    """
+    The operators and methods of a domain, and the table the search uses
+    to dispatch on task names:
+    - operators is a dict from operator names to operators;
+    - methods is a dict from task names to tuples of methods;
+    - table maps each task name to its operator, or to the tuple of its
+      methods if it is not the name of an operator;
+    - arity maps each task name to (lo,hi), the least and greatest number
+      of arguments a task with that name can have (hi is None if there is
+      no greatest).
+    """
+    __slots__ = ('operators','methods','table','arity')
+
+    def __init__(self,operators,methods,table,arity):
+        self.operators = operators
+        self.methods = methods
+        self.table = table
+        self.arity = arity
+
+    def check(self,tasks):
+        """
+        Raise TypeError if a task in tasks has the name of an operator or
+        method but the wrong number of arguments for it.
+        """
+        for task in tasks:
+            if task[0] in self.arity:
+                (lo,hi) = self.arity[task[0]]
+                n = len(task) - 1
+                if n < lo or (hi is not None and n > hi):
+                    raise TypeError('task {} has {} arguments, but {} takes '
+                                    '{}'.format(task,n,task[0],
+                                                _arity_text(lo,hi)))
+
+    def __reduce__(self):
+        return (CompiledDomain,
+                (self.operators,self.methods,self.table,self.arity))
+
+    def __repr__(self):
+        return 'CompiledDomain({} operators, {} tasks with methods)'.format(
+            len(self.operators),len(self.methods))
+
+
+class Domain(object):
+    """
+    A named set of operators and methods that can be added to. operators and
+    methods are dicts like hop's, and version counts the declarations.
+    """
+
+    def __init__(self,name='domain'):
+        self.name = name
+        self.operators = {}
+        self.methods = {}
+        self.version = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def declare_operators(self,*op_list):
+        """Add the functions in op_list to the operators, by name."""
+        with self._lock:
+            self.operators.update({op.__name__:op for op in op_list})
+            self.version += 1
+        return self.operators
+
+    def declare_methods(self,task_name,*method_list):
+        """Make the functions in method_list the methods for task_name."""
+        with self._lock:
+            self.methods.update({task_name:list(method_list)})
+            self.version += 1
+        return self.methods[task_name]
+
+    def snapshot(self,check=True):
+        """
+        Return the CompiledDomain (see compile_domain) for the operators and
+        methods declared so far. The same one is returned until something
+        more is declared.
+        """
+        with self._lock:
+            if self._snapshot is None or self._snapshot[0] != self.version:
+                self._snapshot = (self.version,compile_domain(
+                    self.operators,self.methods,check))
+            return self._snapshot[1]
+
+    def __repr__(self):
+        return 'Domain({!r}, {} operators, {} tasks with methods)'.format(
+            self.name,len(self.operators),len(self.methods))
+
+
+def compile_domain(operators,methods,check=True):
+    """
+    Return a CompiledDomain for the operators and methods. If check is
+    true, raise ValueError if a name has both an operator and methods (the
+    methods would never be used), and TypeError if a function takes no
+    state argument, or if the methods for a task don't agree on how many
+    arguments it can have. If check is false, don't check anything, and
+    leave arity empty.
+    """
+    table = dispatch_table(operators,methods)
+    methods = {name:tuple(mlist) for (name,mlist) in methods.items()}
+    if not check:
+        return CompiledDomain(dict(operators),methods,table,{})
+    for name in methods:
+        if name in operators:
+            raise ValueError(
+                '{} is the name of an operator and of a task with '
+                'methods'.format(name))
+    arity = {}
+    for (name,op) in operators.items():
+        arity[name] = _arity(op)
+    for (name,mlist) in methods.items():
+        (lo,hi) = (0,None)
+        for method in mlist:
+            (mlo,mhi) = _arity(method)
+            lo = max(lo,mlo)
+            hi = mhi if hi is None else (hi if mhi is None else min(hi,mhi))
+            if hi is not None and lo > hi:
+                raise TypeError('the methods for {} disagree on how many '
+                                'arguments it takes'.format(name))
+        arity[name] = (lo,hi)
+    return CompiledDomain(dict(operators),methods,table,arity)
+
+def dispatch_table(operators,methods):
+    """
+    Return the table of a CompiledDomain for operators and methods, without
+    checking them. Where a name has both an operator and methods, the
+    operator is used, just as the search has always done.
+    """
+    table = {name:tuple(mlist) for (name,mlist) in methods.items()}
+    table.update(operators)
+    return table
+
+def _arity(function):
+    """
+    Return (lo,hi) for the number of arguments, after the state, with which
+    function can be called. Raise TypeError if it can't take a state.
+    """
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (AttributeError,TypeError,ValueError):
+        # No signature to be had (Python 2, or some builtins): trust it.
+        return (0,None)
+    (lo,hi) = (0,0)
+    for p in parameters:
+        if p.kind in (p.POSITIONAL_ONLY,p.POSITIONAL_OR_KEYWORD):
+            hi += 1
+            if p.default is p.empty:
+                lo += 1
+        elif p.kind == p.VAR_POSITIONAL:
+            hi = None
+            break
+    if hi == 0:
+        raise TypeError('{} takes no state argument'.format(
+            getattr(function,'__name__',function)))
+    return (max(lo-1,0), None if hi is None else hi-1)
+
+def _arity_text(lo,hi):
+    if hi is None:
+        return 'at least {}'.format(lo)
+    if lo == hi:
+        return str(lo)
+    return '{} to {}'.format(lo,hi)
@@ -0,0 +1,339 @@
+"""
+The search engine behind hop.plan.
+
+Pyhop's original planner called itself once per task (seek_plan called
+search_operators or search_methods, which called seek_plan again), so the
+depth of the Python stack grew with the length of the plan, and a
+blocks-world problem of a few hundred blocks ran into Python's recursion
+limit. This engine does the same depth-first search with a loop and an
+explicit stack of choice points. Applying an operator needs no choice
+point at all, since there is nothing to go back to; a method task pushes
+one that holds the task's remaining methods, and backtracking resumes the
+most recent choice point that still has a method to try.
+
+The engine visits the same nodes in the same order as the recursive
+planner did, and tells a tracer (see pyhop.trace) about what it does.
+
+Inside the engine, the pending tasks and the partial plan are persistent
+linked lists of (head, tail) pairs, with None as the empty list. Moving past
+a task or adding an action to the plan is then O(1) rather than a copy of a
+Python list, and every choice point shares the tails it has in common with
+the others. The plan is built in reverse and turned into a list only when
+it is returned, so the time and memory for a plan grow linearly with its
+length. Task names are looked up in a single table that maps each one to
+its operator or to its tuple of methods (see pyhop.domain), so deciding
+what to do with a task takes one dict lookup.
+
+A method can be a generator function that yields several lists of
+subtasks, one per way of decomposing the task, rather than returning one.
+The search takes them one at a time, going back to the generator for the
+next one only when it backtracks to the task, and then on to the next
+method once the generator is finished. So a method can offer many
+alternatives (a candidate block to move, say) and work out each only if
+the search needs it.
+
+search is the engine itself, as a generator that can stop after every so
+many nodes and let its caller do something else before resuming it (see
+pyhop.aio); seek_plan runs it without stopping.
+
+The search can also be given budgets: a number of nodes, a depth, and a
+number of seconds. Running out of nodes or time stops the search at once,
+and a node at the maximum depth is a dead end unless it has no tasks left.
+In both cases the result is a BudgetExhausted object rather than False,
+since a plan may exist beyond the budget. The budgets are checked by
+counting nodes down to the next point at which one of them (or a pause)
+is due, so a search with no budgets does one test per node for all of
+them.
+
+With loop_check, the search also stops going round in circles: a method
+whose subtasks lead back, through any number of steps, to the same tasks
+in the same state is a dead end there. The method tasks on the current
+path are the ones that have choice points on the stack, so a set of their
+keys (the state's fingerprint and the hash of the task list, as for the
+failure cache) is kept alongside the stack, and each check is one lookup.
+"""
+from __future__ import print_function
+import copy
+from types import GeneratorType
+
+from pyhop.domain import dispatch_table
+from pyhop.fingerprint import state_fingerprint
+from pyhop.helpers import reversed_list, to_linked
+from pyhop.memo import hash_tasks
+from pyhop.stats import clock
+from pyhop.trace import PrintTracer
+
+
+# how many search nodes the engine visits between checks of the clock,
+# when it has a time limit
+TIME_CHECK_INTERVAL = 100
+
+
+class BudgetExhausted(object):
+    """
+    The result of a search that stopped because it ran out of a budget
+    before it found a plan; reason is 'nodes', 'time' or 'depth'. Like
+    False, it is false in a boolean test, but it is not equal to False.
+    """
+    __slots__ = ('reason',)
+
+    def __init__(self,reason):
+        self.reason = reason
+
+    def __bool__(self):
+        return False
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return 'BudgetExhausted({!r})'.format(self.reason)
+
+
+def seek_plan(state,tasks,operators,methods,plan,depth,verbose=0,
+              undo_log=None,stats=None,tracer=None,failure_cache=None,
+              max_nodes=None,max_depth=None,time_limit=None,loop_check=False):
+    """
+    Workhorse for pyhop. state, tasks, operators, and methods are as in the
+    plan function; operators may instead be a pyhop.domain.CompiledDomain,
+    with methods None.
+    - plan is the current partial plan.
+    - depth is the search depth, for use in debugging.
+    - verbose is whether to print debugging messages; it is ignored if
+      tracer is given.
+    - undo_log is None, or the pyhop.trail.Trail on which state records its
+      writes; in that case the operators modify state in place, and
+      backtracking undoes their changes instead of discarding copies.
+    - stats is None, or a pyhop.stats.SearchStats to record the search in.
+    - tracer is None, or a pyhop.trace.Tracer to tell about the search.
+    - failure_cache is None, or a pyhop.memo.FailureCache of subproblems
+      known to fail; the search skips those and adds the ones it finds.
+    - max_nodes, max_depth and time_limit are None, or the number of nodes
+      the search may visit, the depth it may reach, and the number of
+      seconds it may take.
+    - if loop_check is true, a method task is a dead end if the same task
+      list in the same state (by fingerprint) is already on the path from
+      the root of the search to it.
+    Return the plan that was found, False if there is none, or a
+    BudgetExhausted object if the search ran out of a budget first.
+    """
+    for result in search(state,tasks,operators,methods,plan,depth,verbose,
+                         undo_log,stats,tracer,failure_cache,
+                         max_nodes,max_depth,time_limit,loop_check=loop_check):
+        return result
+
+def search(state,tasks,operators,methods,plan,depth,verbose=0,undo_log=None,
+           stats=None,tracer=None,failure_cache=None,max_nodes=None,
+           max_depth=None,time_limit=None,pause_every=None,
+           loop_check=False,all_plans=False):
+    """
+    A generator that does what seek_plan does, with the same arguments. If
+    pause_every is a number, it yields None after visiting every
+    pause_every nodes, and carries on from there when it is resumed. At the
+    end, it yields the plan that was found, False, or a BudgetExhausted.
+    If all_plans is true, it yields each plan as it finds it and carries on
+    looking for the next, and at the end it yields False or a
+    BudgetExhausted.
+    """
+    # Each choice point is (relevant,state,task,rest,plan,depth,mark,key,
+    # hashes,cutoffs), where relevant is an iterator over the decompositions
+    # of task still to be tried (see _decompositions), rest is the linked
+    # list of tasks that follow it, and mark is the point on undo_log to
+    # return to before trying another one. With a failure cache or a loop
+    # check, key identifies the subproblem that fails if no method works,
+    # and hashes is the task hash list (see hash_tasks) for rest. cutoffs
+    # is the number of cutoffs (dead ends due to max_depth or to the loop
+    # check rather than to failure) there had been when the choice point
+    # was made; if there have been more by the time it runs out of methods,
+    # its subproblem isn't known to fail, and doesn't go in the cache. The
+    # keys of the choice points on the stack, which are the method tasks on
+    # the path to the current node, are also in the set on_path. The plan
+    # is kept as a linked list with the latest action first.
+    choices = []
+    mark = key = hashes = on_path = None
+    cutoffs = 0
+    depth_cutoff = False
+    deadline = None if time_limit is None else clock() + time_limit
+    countdown = next_check = _nodes_to_next_check(0,max_nodes,deadline,
+                                                  pause_every)
+    if loop_check:
+        on_path = set()
+    keyed = failure_cache is not None or loop_check
+    if keyed:
+        arg_hashes = {}
+        hashes = hash_tasks(tasks,None,arg_hashes)
+    tasks = to_linked(tasks)
+    plan = to_linked(plan[::-1])
+    copy_state = copy.deepcopy
+    undo = undo_log.undo if undo_log is not None else None
+    if tracer is None and verbose>1:
+        tracer = PrintTracer(verbose)
+    if methods is None:
+        (operators,methods,table) = \
+            (operators.operators,operators.methods,operators.table)
+    else:
+        table = None
+    if stats is not None:
+        operators = stats.timed_operators(operators)
+        methods = stats.timed_methods(methods)
+        table = None
+        copy_state = stats.timed_copy(copy_state)
+        if undo is not None:
+            undo = stats.timed_copy(undo)
+    if table is None:
+        table = dispatch_table(operators,methods)
+    while True:
+        if countdown is not None:
+            if countdown == 0:
+                visited = next_check
+                if max_nodes is not None and visited >= max_nodes:
+                    yield BudgetExhausted('nodes')
+                    return
+                if deadline is not None and clock() >= deadline:
+                    yield BudgetExhausted('time')
+                    return
+                if pause_every is not None and visited % pause_every == 0:
+                    yield None
+                countdown = _nodes_to_next_check(visited,max_nodes,deadline,
+                                                 pause_every)
+                next_check = visited + countdown
+            countdown -= 1
+        if stats is not None:
+            stats.nodes += 1
+            if depth > stats.max_depth:
+                stats.max_depth = depth
+        if tracer is not None:
+            tracer.enter(depth,tasks)
+        if tasks is None:
+            found = reversed_list(plan)
+            if tracer is not None:
+                tracer.plan_found(depth,found)
+            yield found
+            if not all_plans:
+                return
+            # Go on to the next plan by backtracking, as if this node were
+            # a dead end; counting it as a cutoff keeps the subproblems
+            # above it out of the failure cache.
+            cutoffs += 1
+        else:
+            (task,rest) = tasks
+            action = table.get(task[0])
+            if depth == max_depth:
+                cutoffs += 1
+                depth_cutoff = True
+                if stats is not None:
+                    stats.backtracks += 1
+                if tracer is not None:
+                    tracer.backtrack(depth)
+            elif action is None:
+                if stats is not None:
+                    stats.backtracks += 1
+                if tracer is not None:
+                    tracer.unknown_task(depth,task)
+                    tracer.backtrack(depth)
+            elif action.__class__ is not tuple:
+                if undo_log is None:
+                    newstate = action(copy_state(state),*task[1:])
+                else:
+                    newstate = action(state,*task[1:])
+                if tracer is not None:
+                    tracer.operator_applied(depth,task,newstate)
+                if newstate:
+                    state = newstate
+                    tasks = rest
+                    plan = (task,plan)
+                    depth += 1
+                    if hashes is not None:
+                        hashes = hashes[1]
+                    continue
+                if stats is not None:
+                    stats.backtracks += 1
+                if tracer is not None:
+                    tracer.backtrack(depth)
+            else:
+                if keyed:
+                    key = (state_fingerprint(state),hashes[0])
+                if failure_cache is not None and key in failure_cache:
+                    if stats is not None:
+                        stats.backtracks += 1
+                    if tracer is not None:
+                        tracer.backtrack(depth)
+                elif on_path is not None and key in on_path:
+                    cutoffs += 1
+                    if stats is not None:
+                        stats.backtracks += 1
+                    if tracer is not None:
+                        tracer.backtrack(depth)
+                else:
+                    if tracer is not None:
+                        tracer.method_instance(depth,task)
+                    if undo_log is not None:
+                        mark = undo_log.mark()
+                    if hashes is not None:
+                        hashes = hashes[1]
+                    if on_path is not None:
+                        on_path.add(key)
+                    choices.append((_decompositions(action,state,task[1:]),
+                                    state,task,rest,plan,depth,mark,key,hashes,
+                                    cutoffs))
+        # Either the task was a method task, or the search failed here (or
+        # found a plan, and is looking for more). In all cases, go on with
+        # the next method at the latest choice.
+        while choices:
+            (relevant,state,task,rest,plan,depth,mark,key,hashes,
+             cutoffs_before) = choices[-1]
+            if undo is not None:
+                undo(mark)
+            for (method,subtasks) in relevant:
+                # Can't just say "if subtasks:", because that's wrong if
+                # subtasks == []
+                if subtasks != False:
+                    if tracer is not None:
+                        tracer.method_tried(depth,task,method,subtasks)
+                    tasks = to_linked(subtasks,rest)
+                    depth += 1
+                    if key is not None:
+                        hashes = hash_tasks(subtasks,hashes,arg_hashes)
+                    break
+                if tracer is not None:
+                    tracer.method_failed(depth,task,method)
+            else:
+                choices.pop()
+                if on_path is not None:
+                    on_path.discard(key)
+                if failure_cache is not None and cutoffs == cutoffs_before:
+                    failure_cache.add(key)
+                continue
+            break
+        else:
+            yield BudgetExhausted('depth') if depth_cutoff else False
+            return
+
+def _decompositions(methods,state,args):
+    """
+    Yield (method,subtasks) for each method in turn, where subtasks is what
+    the method returns for state and args; or, if the method is a generator
+    function, for each list of subtasks that it yields. Each one is got
+    only when the search backtracks to it, with the state as it was when
+    the method was first called.
+    """
+    for method in methods:
+        subtasks = method(state,*args)
+        if subtasks.__class__ is GeneratorType:
+            for alternative in subtasks:
+                yield (method,alternative)
+        else:
+            yield (method,subtasks)
+
+def _nodes_to_next_check(visited,max_nodes,deadline,pause_every):
+    """
+    Return how many more nodes the search can visit, after visiting
+    visited of them, before it must check its budgets or pause; or None if
+    it never need do so.
+    """
+    counts = []
+    if max_nodes is not None:
+        counts.append(max_nodes - visited)
+    if deadline is not None:
+        counts.append(TIME_CHECK_INTERVAL - visited % TIME_CHECK_INTERVAL)
+    if pause_every is not None:
+        counts.append(pause_every - visited % pause_every)
+    return min(counts) if counts else None
@@ -0,0 +1,128 @@
+"""
+Fingerprints (hash values) of states.
+
+The fingerprint of a state combines a hash value for each of the state's
+variables, leaving out __name__, just as print_state does. A dict-valued
+variable is hashed by combining a hash value for each of its entries with
+exclusive-or, so the fingerprint doesn't depend on the order in which the
+entries were added, and two states that print_state shows with the same
+values have the same fingerprint.
+
+A mapping can keep its fingerprint up to date as it is changed, rather
+than have it recomputed from all of its entries: it does so by having a
+fingerprint() method that returns an attribute _fp, which it updates with
+set_fingerprint on each write. Replacing the entry key:old with key:new
+changes _fp by exclusive-or with entry_hash(key,old) and
+entry_hash(key,new), in O(1) time. CowDicts (see pyhop.cow) and TrailDicts
+(see pyhop.trail) work this way, so the fingerprint of a state made of them
+takes time proportional to the number of its variables, not its size.
+
+A state's values needn't be hashable, though: a tuple holding a list, say,
+or an object that defines __eq__ but not __hash__. When a write stores or
+removes such a value, the mapping's _fp becomes None, for unknown, and so
+does that of each mapping it belongs to; the fingerprint is then computed
+from all of the entries the next time it is asked for (and raises the
+TypeError then, if a value still can't be hashed). So only the failure
+cache and loop_check, which ask for fingerprints, need hashable values.
+
+Fingerprints are made from Python's hash values, so they are stable for
+the life of a process (and across processes if PYTHONHASHSEED is set).
+"""
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+# the fingerprint of an empty mapping, which is not the hash of 0
+MAPPING_SEED = 0x2545F491
+
+_ATOMS = frozenset([str, bytes, int, float, bool, type(None), tuple])
+
+
+def entry_hash(key,val):
+    """The hash value that the entry key:val contributes to a mapping's."""
+    if type(val) in _ATOMS:
+        return hash((key,hash(val)))
+    return hash((key,fingerprint(val)))
+
+def fingerprint(val):
+    """
+    Return a hash value for val. Mappings, lists and sets are hashed by
+    content, so they needn't be hashable themselves.
+    """
+    if isinstance(val,Mapping):
+        incremental = getattr(val,'fingerprint',None)
+        if incremental is not None:
+            return incremental()
+        return mapping_fingerprint(val)
+    if isinstance(val,list):
+        return hash(tuple(fingerprint(x) for x in val))
+    if isinstance(val,(set,frozenset)):
+        return hash(frozenset(fingerprint(x) for x in val))
+    return hash(val)
+
+def mapping_fingerprint(d):
+    """Return a hash value for the entries of the mapping d."""
+    fp = MAPPING_SEED
+    for (k,v) in d.items():
+        fp ^= entry_hash(k,v)
+    return fp
+
+def known_fingerprint(d):
+    """Return mapping_fingerprint(d), or None if a value can't be hashed."""
+    try:
+        return mapping_fingerprint(d)
+    except TypeError:
+        return None
+
+def toggle_entry(fp,key,val):
+    """
+    Return the fingerprint fp with the entry key:val added to it, or removed
+    from it if it has it (exclusive-or being its own inverse); or None if fp
+    is None (unknown) or val can't be hashed.
+    """
+    if fp is None:
+        return None
+    try:
+        return fp ^ entry_hash(key,val)
+    except TypeError:
+        return None
+
+def set_fingerprint(d,fp):
+    """
+    Set the fingerprint d._fp of an incrementally hashed mapping to fp. If
+    d is a value in another such mapping, d._owner is (that mapping, key),
+    and that mapping's fingerprint is updated too, and so on upwards. An
+    unknown (None) fingerprint makes those of the mappings above it unknown.
+    """
+    while True:
+        old = d._fp
+        d._fp = fp
+        if d._owner is None:
+            return
+        (d,key) = d._owner
+        if d._fp is None:
+            return
+        if old is None or fp is None:
+            fp = None
+        else:
+            fp = d._fp ^ hash((key,old)) ^ hash((key,fp))
+
+def state_fingerprint(state):
+    """
+    Return a hash value for the variables of state, from its fingerprint
+    method if it has one (as hop.State and the states of pyhop.schema do).
+    """
+    own = getattr(state,'fingerprint',None)
+    if own is not None:
+        return own()
+    return variables_fingerprint(state)
+
+def variables_fingerprint(state):
+    """Return a hash value for the variables of state, from vars(state)."""
+    fp = 0
+    for (name,val) in vars(state).items():
+        if name != '__name__':
+            fp ^= entry_hash(name,val)
+    return fp
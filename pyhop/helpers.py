@@ -16,16 +16,63 @@ def find_if(cond,seq):
         if cond(x): return x
     return None
 
-def is_done(b1,state,goal, done_state):
-    if b1 == done_state: return True
-    if b1 in goal.pos and goal.pos[b1] != state.pos[b1]:
-        return False
-    if state.pos[b1] == done_state: return True
-    return is_done(state.pos[b1],state,goal,done_state)
+def is_done(b1,state,goal,done_state,memo=None):
+    """
+    True if b1 and every block under it are where goal wants them (or where
+    they are, if goal doesn't say), down to done_state. If memo is a dict,
+    the answers for b1 and the blocks under it are looked up in it and
+    remembered there, so that calls that share a memo (for the same state)
+    look at each block only once.
+    """
+    pos = state.pos
+    goal_pos = goal.pos
+    path = []
+    while b1 != done_state:
+        if memo is not None and b1 in memo:
+            done = memo[b1]
+            break
+        below = pos[b1]
+        if b1 in goal_pos and goal_pos[b1] != below:
+            done = False
+            break
+        path.append(b1)
+        b1 = below
+    else:
+        done = True
+    if memo is not None:
+        if not done:
+            memo[b1] = False
+        for b in path:
+            memo[b] = done
+    return done
 
 def all(state):
     return state.clear.keys()
 
+def to_linked(items,tail=None):
+    """
+    Return the linked list of items, followed by the linked list tail.
+    A linked list is a (head, tail) pair, or None for the empty list.
+    """
+    for item in reversed(items):
+        tail = (item,tail)
+    return tail
+
+def from_linked(linked):
+    """Return the items of a linked list, as a Python list."""
+    items = []
+    while linked is not None:
+        (item,linked) = linked
+        items.append(item)
+    return items
+
+def reversed_list(linked):
+    """Return the items of a linked list in reverse order."""
+    items = from_linked(linked)
+    items.reverse()
+    return items
+
+
 def print_state(state,indent=4):
     """Print each variable in state, indented by indent spaces."""
     if state != False:
@@ -16,7 +16,9 @@ Copyright 2013 Dana S. Nau - http://www.cs.umd.edu/~nau
    See the License for the specific language governing permissions and
    limitations under the License.
 
-Pyhop should work correctly in both Python 2.7 and Python 3.2.
+Pyhop should work correctly in both Python 2.7 and Python 3.2. A few of
+the optional modules need Python 3: pyhop.parallel (which plan's workers
+option and plan_many use) and pyhop.aio.
 For examples of how to use it, see the example files that come with Pyhop.
 
 Pyhop provides the following classes and functions:
@@ -55,6 +57,20 @@ Pyhop provides the following classes and functions:
 - if verbose = 1, it prints the initial parameters and the answer;
 - if verbose = 2, it also prints a message on each recursive call;
 - if verbose = 3, it also prints info about what it's computing.
+
+- iter_plans(state1,tasklist) yields all of the plans for tasklist, one at
+  a time, in the order in which plan's search finds them.
+
+- plan_many(problems) finds plans for many (state,tasklist) pairs at once,
+  in a pool of processes, and yields the results as they are ready.
+
+- If the world changes while a plan is being carried out, the plan can be
+  repaired rather than found again from scratch: see pyhop.repair.
+
+- declare_operators and declare_methods add to default_domain. To have
+  several domains at once, make a pyhop.domain.Domain for each, declare
+  its operators and methods with its own declare_operators and
+  declare_methods, and give it to plan in place of the operators.
 """
 
 # Pyhop's planning algorithm is very similar to the one in SHOP and JSHOP
@@ -96,6 +112,12 @@ Pyhop provides the following classes and functions:
 from __future__ import print_function
 import copy
 
+from pyhop import cow, trail
+from pyhop.domain import Domain
+from pyhop.engine import BudgetExhausted, search, seek_plan
+from pyhop.fingerprint import variables_fingerprint
+from pyhop.stats import clock
+from pyhop.trace import PrintTracer, TeeTracer
 from pyhop.helpers import (
     print_goal, print_methods, print_operators, print_state)
 
@@ -103,11 +125,46 @@ from pyhop.helpers import (
 ############################################################
 # States and goals
 
-class State():
+class State(object):
     """A state is just a collection of variable bindings."""
     def __init__(self,name):
         self.__name__ = name
 
+    def fingerprint(self):
+        """
+        Return a hash value for the state's variables (see pyhop.fingerprint).
+        It takes O(1) time per variable whose value keeps its fingerprint up
+        to date, as those in the states that plan searches through do.
+        """
+        return variables_fingerprint(self)
+
+    def __eq__(self,other):
+        """
+        Two states are equal if they have the same variables with equal
+        values, whatever their names, just as print_state shows them.
+        """
+        if not isinstance(other,State):
+            return NotImplemented
+        return _variables(self) == _variables(other)
+
+    def __ne__(self,other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return self.fingerprint()
+
+    def __deepcopy__(self,memo):
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        for (name,val) in vars(self).items():
+            new.__dict__[name] = copy.deepcopy(val,memo)
+        return new
+
+def _variables(state):
+    return {name:val for (name,val) in vars(state).items()
+            if name != '__name__'}
+
 class Goal():
     """A goal is just a collection of variable bindings."""
     def __init__(self,name):
@@ -116,16 +173,18 @@ class Goal():
 ############################################################
 # Commands to tell Pyhop what the operators and methods are
 
-operators = {}
-methods = {}
+# the domain that declare_operators and declare_methods add to; its
+# version tells a pyhop.plancache.PlanCache when it may have changed
+default_domain = Domain('default')
+operators = default_domain.operators
+methods = default_domain.methods
 
 def declare_operators(*op_list):
     """
     Call this after defining the operators, to tell Pyhop what they are.
     op_list must be a list of functions, not strings.
     """
-    operators.update({op.__name__:op for op in op_list})
-    return operators
+    return default_domain.declare_operators(*op_list)
 
 def declare_methods(task_name,*method_list):
     """
@@ -133,8 +192,7 @@ def declare_methods(task_name,*method_list):
     task_name must be a string.
     method_list must be a list of functions, not strings.
     """
-    methods.update({task_name:list(method_list)})
-    return methods[task_name]
+    return default_domain.declare_methods(task_name,*method_list)
 
 def get_operators():
     return operators
@@ -145,69 +203,165 @@ def get_methods():
 ############################################################
 # The actual planner
 
-def plan(state,tasks,operators,methods,verbose=0):
+def plan(state,tasks,operators,methods=None,verbose=0,copy_on_write=True,
+         in_place=False,stats=None,tracer=None,failure_cache=None,
+         max_nodes=None,max_depth=None,time_limit=None,workers=None,
+         plan_cache=None,loop_check=False):
     """
     Try to find a plan that accomplishes tasks in state.
     If successful, return the plan. Otherwise return False.
+    operators may be a pyhop.domain.Domain or CompiledDomain instead of a
+    dict, in which case methods is left out, and the tasks' arguments are
+    checked against the domain (or its snapshot) first.
+    If copy_on_write is true (the default), the search works on a copy of
+    state whose dict-valued variables are copy-on-write (see pyhop.cow), so
+    applying an operator costs time proportional to the entries it writes
+    rather than to the size of the state.
+    If in_place is true, the search instead modifies a single copy of state
+    in place and undoes the changes when it backtracks (see pyhop.trail).
+    If stats is a pyhop.stats.SearchStats object, the search records its
+    counters and timings there.
+    If tracer is a pyhop.trace.Tracer, the search tells it about each step;
+    it does so in addition to printing what verbose asks for.
+    If failure_cache is a pyhop.memo.FailureCache, the search remembers
+    there the subproblems that fail, and doesn't explore them again.
+    max_nodes, max_depth and time_limit set budgets for the number of nodes
+    the search visits, the depth it reaches, and the seconds it takes. If
+    the search runs out of one before it finds a plan, plan returns a
+    BudgetExhausted object (see pyhop.engine), which is false like False but
+    tells the caller that a plan may exist beyond the budget.
+    If loop_check is true, the search doesn't decompose a task when the
+    same tasks in the same state are already being decomposed further up
+    the path it is on (see pyhop.engine), so that recursive methods that
+    lead back where they started fail rather than loop forever.
+    If workers is a number, the search is divided among that many processes
+    (see pyhop.parallel); it can't be combined with the options between
+    verbose and workers, other than copy_on_write, or with loop_check.
+    If plan_cache is a pyhop.plancache.PlanCache, plan first looks there for
+    the answer to the same problem, and stores there the answers it finds
+    (other than BudgetExhausted ones); an answer from the cache is printed
+    in one line if verbose>0, but stats and tracer hear nothing of it.
     """
-    if verbose>0: print(
-        '** hop, verbose={}: **\n   state = {}\n   tasks = {}'.format(
-            verbose, state.__name__, tasks))
-    result = seek_plan(state,tasks,operators,methods,[],0,verbose)
-    if verbose>0: print('** result =',result,'\n')
+    if workers is not None and (
+            in_place or stats is not None or tracer is not None or
+            failure_cache is not None or max_nodes is not None or
+            max_depth is not None or time_limit is not None or loop_check):
+        raise ValueError('workers cannot be combined with in_place, stats, '
+                         'tracer, failure_cache, max_nodes, max_depth, '
+                         'time_limit or loop_check')
+    if isinstance(operators,Domain):
+        operators = operators.snapshot()
+    if plan_cache is not None:
+        key = plan_cache.key(state,tasks,operators,methods,
+                             default_domain.version,
+                             {'max_depth':max_depth,'loop_check':loop_check})
+        result = plan_cache.get(key)
+        if result is not None:
+            if verbose>0:
+                print('** hop, verbose={}: ** result from cache = {}\n'.format(
+                    verbose,result))
+            return result
+    if workers is not None:
+        # pyhop.parallel needs concurrent.futures, which Python 2.7 lacks
+        from pyhop import parallel
+        result = parallel.plan(state,tasks,operators,methods,
+                               workers=workers,verbose=verbose)
+    else:
+        for result in _plan_steps(state,tasks,operators,methods,verbose,
+                                  copy_on_write,in_place,stats,tracer,
+                                  failure_cache,max_nodes,max_depth,
+                                  time_limit,loop_check=loop_check):
+            break
+    if plan_cache is not None and not isinstance(result,BudgetExhausted):
+        plan_cache.put(key,result)
     return result
 
-def search_operators(state,tasks,operators,methods,plan,task,depth,verbose):
-    if verbose>2:
-        print('depth {} action {}'.format(depth,task))
-    operator = operators[task[0]]
-    newstate = operator(copy.deepcopy(state),*task[1:])
-    if verbose>2:
-        print('depth {} new state:'.format(depth))
-        print_state(newstate)
-    if newstate:
-        solution = seek_plan(
-            newstate,tasks[1:],operators,methods,plan+[task],depth+1,verbose)
-        if solution != False:
-            return solution
-
-def search_methods(state,tasks,operators,methods,plan,task,depth,verbose):
-    if verbose>2:
-        print('depth {} method instance {}'.format(depth,task))
-    relevant = methods[task[0]]
-    for method in relevant:
-        subtasks = method(state,*task[1:])
-        # Can't just say "if subtasks:", because that's wrong if
-        # subtasks == []
-        if verbose>2:
-            print('depth {} new tasks: {}'.format(depth,subtasks))
-        if subtasks != False:
-            solution = seek_plan(
-                state,subtasks+tasks[1:],operators,methods,plan,depth+1,verbose)
-            if solution != False:
-                return solution
-
-def seek_plan(state,tasks,operators,methods,plan,depth,verbose=0):
+def _plan_steps(state,tasks,operators,methods,verbose,copy_on_write,
+                in_place,stats,tracer,failure_cache,max_nodes,max_depth,
+                time_limit,pause_every=None,loop_check=False,all_plans=False):
+    """
+    The body of plan, as a generator like pyhop.engine.search: it yields
+    None after every pause_every nodes, if that is a number, and at the end
+    it yields plan's result. If all_plans is true, it also yields each plan
+    as the search finds it.
+    """
+    if verbose>0:
+        printer = PrintTracer(verbose)
+        tracer = printer if tracer is None else TeeTracer(printer,tracer)
+    if isinstance(operators,Domain):
+        operators = operators.snapshot()
+    if methods is None:
+        operators.check(tasks)
+    if tracer is not None:
+        tracer.start(state,tasks)
+    if stats is not None:
+        start = clock()
+    undo_log = None
+    if in_place:
+        undo_log = trail.Trail()
+        state = trail.trail_state(state,undo_log)
+    elif copy_on_write:
+        state = cow.cow_state(state)
+    steps = search(state,tasks,operators,methods,[],0,
+                   undo_log=undo_log,stats=stats,tracer=tracer,
+                   failure_cache=failure_cache,max_nodes=max_nodes,
+                   max_depth=max_depth,time_limit=time_limit,
+                   pause_every=pause_every,loop_check=loop_check,
+                   all_plans=all_plans)
+    result = next(steps)
+    # a plan may be [], which is false, so the end of the plans is told by
+    # False or a BudgetExhausted
+    while result is None or (all_plans and result is not False and
+                             not isinstance(result,BudgetExhausted)):
+        if stats is not None:
+            stats.time += clock() - start
+        yield result
+        if stats is not None:
+            start = clock()
+        result = next(steps)
+    if stats is not None:
+        stats.time += clock() - start
+    if tracer is not None:
+        tracer.finish(result)
+    yield result
+
+def iter_plans(state,tasks,operators,methods=None,limit=None,verbose=0,
+               copy_on_write=True,in_place=False,stats=None,tracer=None,
+               failure_cache=None,max_nodes=None,max_depth=None,
+               time_limit=None,loop_check=False):
+    """
+    Yield every plan for tasks in state (or the first limit of them, if
+    limit is a number), in the order in which plan's depth-first search
+    finds them; the first is the plan that plan returns. The plans are
+    found one at a time, as they are asked for, so only the search path,
+    not the plans already yielded, takes up memory. The other arguments are
+    as for plan, and the iteration stops early if a budget runs out.
+    """
+    if isinstance(operators,Domain):
+        operators = operators.snapshot()
+    if limit is not None and limit <= 0:
+        return
+    count = 0
+    for result in _plan_steps(state,tasks,operators,methods,verbose,
+                              copy_on_write,in_place,stats,tracer,
+                              failure_cache,max_nodes,max_depth,time_limit,
+                              loop_check=loop_check,all_plans=True):
+        if result is False or isinstance(result,BudgetExhausted):
+            return
+        yield result
+        count += 1
+        if count == limit:
+            return
+
+def plan_many(problems,operators,methods,workers=None,ordered=False):
     """
-    Workhorse for pyhop. state, tasks, operators, and methods are as in the
-    plam function.
-    - plan is the current partial plan.
-    - depth is the recursion depth, for use in debugging
-    - verbose is whether to print debugging messages
+    Find plans for an iterable of (state,tasks) pairs in a pool of workers
+    processes, and yield a pyhop.parallel.PlanResult for each as soon as it
+    is ready, or in the order of problems if ordered is true (see
+    pyhop.parallel.plan_many).
     """
-    if verbose>1:
-        print('depth {} tasks {}'.format(depth,tasks))
-    if tasks == []:
-        if verbose>2:
-            print('depth {} returns plan {}'.format(depth,plan))
-        return plan
-    task = tasks[0]
-    if task[0] in operators:
-        return search_operators(
-            state,tasks,operators,methods,plan,task,depth,verbose)
-    if task[0] in methods:
-        return search_methods(
-            state,tasks,operators,methods,plan,task,depth,verbose)
-    if verbose>2:
-        print('depth {} returns failure'.format(depth))
-    return False
+    from pyhop import parallel
+    if isinstance(operators,Domain):
+        operators = operators.snapshot()
+    return parallel.plan_many(problems,operators,methods,workers=workers,
+                              ordered=ordered)
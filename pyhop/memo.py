@@ -0,0 +1,126 @@
+"""
+Memoization of failed subproblems.
+
+When the search backtracks, it can meet the same state with the same tasks
+left to do many times over (in the blocks-world methods2.py, for example,
+get_by_pickup and get_by_unstack lead to the same subproblems), and every
+time it explores the whole failing subtree again. A FailureCache remembers
+the subproblems that are known to fail, so that each is explored only once:
+
+    failures = FailureCache(maxsize=100000)
+    hop.plan(state,tasks,operators,methods,failure_cache=failures)
+
+A subproblem is identified by the fingerprint of its state (see
+pyhop.fingerprint) and a hash of its task list. The tasks' arguments are
+hashed by value: an object with variables but no hash of its own, such as
+a Goal, is hashed by its variables, as a state is, and lists, sets and
+dicts by their contents. Such an object is hashed once in each call to
+plan, so it must not change during the search, but it may change between
+calls. The cache holds at most maxsize subproblems, and forgets the least
+recently used ones first. A cache can be used for more than one call to
+plan as long as the operators and methods stay the same.
+"""
+from collections import OrderedDict
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from pyhop.fingerprint import fingerprint, variables_fingerprint
+
+
+# argument types whose hash is by value
+_ATOMS = frozenset([str, bytes, int, float, bool, type(None), frozenset])
+
+
+class FailureCache(object):
+    """
+    A bounded set of keys for subproblems that have no solution, with
+    least-recently-used eviction. hits and misses count the lookups that
+    did and didn't find their key.
+    """
+
+    def __init__(self,maxsize=100000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._keys = OrderedDict()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self,key):
+        if key in self._keys:
+            # move key to the end (OrderedDict.move_to_end needs Python 3)
+            self._keys[key] = self._keys.pop(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self,key):
+        """Remember that the subproblem with this key fails."""
+        self._keys.pop(key,None)
+        self._keys[key] = None
+        if len(self._keys) > self.maxsize:
+            self._keys.popitem(last=False)
+
+    def clear(self):
+        """Forget all subproblems and reset the counters."""
+        self._keys.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return 'FailureCache(maxsize={}, size={}, hits={}, misses={})'.format(
+            self.maxsize,len(self),self.hits,self.misses)
+
+
+def hash_tasks(tasks,hashes=None,memo=None):
+    """
+    Return the linked list of hash values for the list tasks, followed by
+    the linked list hashes of hash values for the tasks after them. The
+    first hash value covers the whole task list, and each one is computed
+    from the one after it, so prepending tasks costs O(1) per task. memo
+    is None or a dict in which the hash values of arguments such as goals
+    are kept (see task_hash); it should last for one search.
+    """
+    for task in reversed(tasks):
+        hashes = (hash((task_hash(task,memo),
+                        0 if hashes is None else hashes[0])), hashes)
+    return hashes
+
+def task_hash(task,memo=None):
+    """
+    Return a hash value for task that depends on the values of its
+    arguments rather than on their identities. If memo is a dict, the
+    hash values of objects hashed by their variables are kept there, by
+    id, along with the objects themselves, so that the ids aren't reused.
+    """
+    for arg in task:
+        if type(arg) not in _ATOMS:
+            break
+    else:
+        return hash(task)
+    return hash(tuple(_value_hash(arg,memo) for arg in task))
+
+def _value_hash(val,memo):
+    cls = type(val)
+    if cls in _ATOMS:
+        return hash(val)
+    if cls is tuple:
+        return hash(tuple(_value_hash(x,memo) for x in val))
+    if isinstance(val,(Mapping,list,set)):
+        return fingerprint(val)
+    if (cls.__hash__ is not object.__hash__ or not hasattr(val,'__dict__')
+        or isinstance(val,type)):
+        return hash(val)
+    if memo is not None:
+        known = memo.get(id(val))
+        if known is not None:
+            return known[1]
+    fp = hash((cls.__name__,variables_fingerprint(val)))
+    if memo is not None:
+        memo[id(val)] = (val,fp)
+    return fp
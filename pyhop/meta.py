@@ -8,3 +8,4 @@ url = "https://github.com/oubiwann/pyhop"
 description = "SHOP-like planner written in Python."
 long_description = description
 requires = []
+extras = {"numpy": ["numpy"]}
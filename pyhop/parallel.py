@@ -0,0 +1,242 @@
+"""
+Parallel planning with a pool of processes.
+
+plan (below) splits the search at its first few method tasks: it tries the
+alternatives there itself, in order, which gives a list of subproblems, each
+a state and the tasks that remain to be done in it. A pool of processes
+then searches the subproblems at the same time. Unless first_found is true,
+the answer is the plan for the earliest subproblem in the list that has one,
+which is the plan the sequential search would have found, since that search
+explores the subproblems in the same order, each completely before the next.
+With first_found true, the answer is whichever plan is found first.
+
+plan_many (below) solves many problems over the same domain, one problem
+per task in the pool, and yields each result as soon as it is ready.
+
+Once the answer is known, the subproblems that haven't started are
+cancelled, and the ones that are running stop at their next check of a
+shared flag, which they make every CHECK_INTERVAL search nodes.
+
+The operators and methods (or a pyhop.domain.CompiledDomain, given in
+place of the operators) are sent to each worker process once, when it
+starts, so they (and the states and tasks) must be picklable: the
+functions must be defined at the top level of a module that the workers
+can import.
+
+This module needs Python 3.2 or later, for concurrent.futures.
+"""
+from __future__ import print_function
+import copy
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait)
+
+from pyhop.cow import cow_state
+from pyhop.domain import Domain, compile_domain
+from pyhop.engine import _decompositions, seek_plan
+from pyhop.stats import clock
+from pyhop.trace import PrintTracer, Tracer
+
+
+# how many search nodes a worker visits between checks for cancellation
+CHECK_INTERVAL = 1000
+
+# how many problems plan_many keeps queued for each worker
+QUEUED_PER_WORKER = 4
+
+
+def plan(state,tasks,operators,methods,workers=None,split_depth=3,
+         first_found=False,verbose=0):
+    """
+    Like hop.plan, but the search is divided among workers processes (by
+    default, one for each CPU). The search is split at up to split_depth
+    levels of method tasks, stopping early once there are at least as many
+    subproblems as workers. If first_found is true, return the first plan
+    that any worker finds, rather than the one the sequential search would.
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    domain = _compiled(operators,methods)
+    tracer = PrintTracer(verbose) if verbose>0 else None
+    if tracer is not None:
+        tracer.start(state,tasks)
+    result = False
+    subproblems = split(state,tasks,domain,None,workers,split_depth)
+    if subproblems:
+        cancelled = multiprocessing.Event()
+        with ProcessPoolExecutor(
+                max_workers=min(workers,len(subproblems)),
+                initializer=_start_worker,
+                initargs=(domain,cancelled)) as pool:
+            futures = [pool.submit(_solve,*sub) for sub in subproblems]
+            if first_found:
+                futures_in_order = as_completed(futures)
+            else:
+                futures_in_order = futures
+            for future in futures_in_order:
+                solution = future.result()
+                if solution is not False:
+                    result = solution
+                    break
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+    if tracer is not None:
+        tracer.finish(result)
+    return result
+
+
+PlanResult = namedtuple('PlanResult','index plan seconds error')
+PlanResult.__doc__ = """
+The outcome of the index'th problem given to plan_many: plan is the plan,
+or False if there is none; seconds is the time the worker spent planning;
+and error is the exception that the planning raised, or None (in which
+case plan is False).
+"""
+
+def plan_many(problems,operators,methods,workers=None,ordered=False):
+    """
+    Find plans for many problems over the same operators and methods, and
+    yield a PlanResult for each as soon as it is ready (or, if ordered is
+    true, in the order of problems). problems is an iterable of (state,tasks)
+    pairs; it is read as the workers need more problems, so it can be a
+    generator. The operators and methods are sent to each worker process
+    once, when it starts, rather than with every problem.
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    domain = _compiled(operators,methods)
+    problems = enumerate(problems)
+    cancelled = multiprocessing.Event()
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_start_worker,
+                             initargs=(domain,cancelled)) as pool:
+        pending = {}
+        finished = {}
+        next_index = 0
+        try:
+            while True:
+                # results held back for the order count against the bound,
+                # so a slow problem stops more from being read
+                while len(pending)+len(finished) < workers*QUEUED_PER_WORKER:
+                    try:
+                        (index,(state,tasks)) = next(problems)
+                    except StopIteration:
+                        break
+                    pending[pool.submit(_solve_problem,state,tasks)] = index
+                if not pending:
+                    break
+                (done,_) = wait(pending,return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        (plan,seconds) = future.result()
+                        result = PlanResult(index,plan,seconds,None)
+                    except Exception as e:
+                        result = PlanResult(index,False,0.0,e)
+                    if not ordered:
+                        yield result
+                    else:
+                        finished[index] = result
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+
+def split(state,tasks,operators,methods,count,levels):
+    """
+    Return a list of subproblems (state,tasks,plan,depth) that between them
+    cover the search for tasks in state, in the order that the sequential
+    search would explore them. Each level of splitting replaces every
+    subproblem by the ones for each applicable method of its next method
+    task; splitting stops after levels levels, or once there are at least
+    count subproblems. A generator method at those levels is run to the end,
+    to get all of its alternatives.
+    """
+    domain = _compiled(operators,methods)
+    subproblems = [(cow_state(state),list(tasks),[],0)]
+    for level in range(levels):
+        if len(subproblems) >= count:
+            break
+        split_further = []
+        for sub in subproblems:
+            split_further.extend(_alternatives(domain.table,*sub))
+        subproblems = split_further
+    return subproblems
+
+def _compiled(operators,methods):
+    if isinstance(operators,Domain):
+        return operators.snapshot()
+    if methods is None:
+        return operators
+    return compile_domain(operators,methods,check=False)
+
+def _alternatives(table,state,tasks,plan,depth):
+    """
+    Apply the operators at the front of tasks, and return the subproblems
+    for the methods of the method task that follows them.
+    """
+    while tasks:
+        task = tasks[0]
+        operator = table.get(task[0])
+        if operator is None or operator.__class__ is tuple:
+            break
+        state = operator(copy.deepcopy(state),*task[1:])
+        if not state:
+            return []
+        (tasks,plan,depth) = (tasks[1:],plan+[task],depth+1)
+    if not tasks:
+        return [(state,tasks,plan,depth)]
+    task = tasks[0]
+    if task[0] not in table:
+        return []
+    subproblems = []
+    for (method,subtasks) in _decompositions(table[task[0]],state,task[1:]):
+        if subtasks != False:
+            subproblems.append((state,list(subtasks)+tasks[1:],plan,depth+1))
+    return subproblems
+
+
+############################################################
+# The worker processes
+
+_domain = {}
+
+class Cancelled(Exception):
+    """Raised in a worker to abandon a search that is no longer needed."""
+
+class _CancelCheck(Tracer):
+    def __init__(self,cancelled):
+        self.cancelled = cancelled
+        self.nodes = 0
+
+    def enter(self,depth,tasks):
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0 and self.cancelled.is_set():
+            raise Cancelled()
+
+def _start_worker(domain,cancelled):
+    _domain.update(domain=domain,cancelled=cancelled)
+
+def _solve_problem(state,tasks):
+    start = clock()
+    try:
+        plan = seek_plan(cow_state(state),tasks,_domain['domain'],None,[],0,
+                         tracer=_CancelCheck(_domain['cancelled']))
+    except Cancelled:
+        plan = False
+    return (plan,clock()-start)
+
+def _solve(state,tasks,plan,depth):
+    cancelled = _domain['cancelled']
+    if cancelled.is_set():
+        return False
+    try:
+        return seek_plan(cow_state(state),tasks,_domain['domain'],None,
+                         plan,depth,tracer=_CancelCheck(cancelled))
+    except Cancelled:
+        return False
@@ -0,0 +1,244 @@
+"""
+Caching of whole plans.
+
+When the same problem is given to plan again and again, a PlanCache lets
+plan answer the repeats without searching:
+
+    plans = PlanCache(maxsize=1000)
+    hop.plan(state,tasks,operators,methods,plan_cache=plans)
+
+A problem is identified by a digest of four things: the variables of the
+initial state (but not its name), the task list, the domain, and the
+options of plan that can change its answer (max_depth and loop_check).
+The digest of a value is made from a canonical text for it, in which the
+entries of dicts and sets are sorted, so it doesn't depend on the order in
+which they were added, and it is the same in every process. The digest of
+the domain is made from the names and the compiled code of its operators
+and methods. Working it out takes a little time, so the cache keeps it for
+as long as hop's version stamp (which declare_operators and declare_methods
+bump) and the operator and method dicts stay the same; if the dicts are
+changed in some other way, call domain_changed().
+
+Only the code of the operators and methods themselves goes into the
+digest, not that of the functions they call (such as status in the
+blocks-world methods1.py). A cache kept on disk can't tell when those have
+changed, so give it a salt, such as a version number of the domain's code,
+and change the salt when the code changes: the salt goes into every digest.
+
+A cache holds at most maxsize plans in memory, and forgets the least
+recently used ones first. If it is given a path, it also keeps every plan
+in an SQLite database there, so that the plans survive the process, and
+it looks there for the plans that aren't in memory. Plans are pickled,
+so the arguments of their actions must be picklable.
+
+Only plans and definite failures (False) are cached, not BudgetExhausted
+results. When plan finds its answer in the cache, the search doesn't run,
+so a tracer or SearchStats object hears nothing of it, and verbose output
+is a single line saying that the result came from the cache. A cache may
+be used by several threads at once.
+"""
+import hashlib
+import pickle
+import sqlite3
+import threading
+import types
+from collections import OrderedDict
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from pyhop.rigid import Rigid
+
+
+class PlanCache(object):
+    """
+    A bounded mapping from problem digests to plans (or False), with
+    least-recently-used eviction and an optional SQLite file at path. salt
+    is a string that goes into every digest. hits and misses count the
+    lookups that did and didn't find a plan.
+    """
+
+    def __init__(self,maxsize=1000,path=None,salt=''):
+        self.maxsize = maxsize
+        self.path = path
+        self.salt = salt
+        self.hits = 0
+        self.misses = 0
+        self._plans = OrderedDict()
+        self._domain = None
+        self._db = None
+        # guards _plans, the counters and the database, whose connection
+        # is shared by all threads
+        self._lock = threading.Lock()
+        if path is not None:
+            self._db = sqlite3.connect(path,check_same_thread=False)
+            with self._db:
+                self._db.execute('CREATE TABLE IF NOT EXISTS plans '
+                                 '(key TEXT PRIMARY KEY, plan BLOB)')
+
+    def __len__(self):
+        return len(self._plans)
+
+    def key(self,state,tasks,operators,methods,version,options=None):
+        """
+        Return the digest for the problem of doing tasks in state with the
+        operators and methods (or a CompiledDomain, with methods None) at
+        hop version stamp version. options is None or a dict of the options
+        of plan that can change its answer.
+        """
+        # another thread may replace _domain, so it is read only once
+        domain = self._domain
+        if (domain is None or domain[0] is not operators or
+            domain[1] is not methods or domain[2] != version):
+            domain = self._domain = (operators,methods,version,
+                                     domain_digest(operators,methods))
+        digest = hashlib.sha1(domain[3].encode('utf-8'))
+        digest.update(canonical(self.salt).encode('utf-8'))
+        digest.update(canonical(_variables(state)).encode('utf-8'))
+        digest.update(canonical(list(tasks)).encode('utf-8'))
+        digest.update(canonical(options or {}).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self,key):
+        """Return the plan stored for key, or None if there isn't one."""
+        with self._lock:
+            if key in self._plans:
+                # move key to the end (OrderedDict.move_to_end needs
+                # Python 3)
+                result = self._plans[key] = self._plans.pop(key)
+                self.hits += 1
+                return _copy(result)
+            if self._db is not None:
+                row = self._db.execute('SELECT plan FROM plans WHERE key = ?',
+                                       (key,)).fetchone()
+                if row is not None:
+                    result = pickle.loads(bytes(row[0]))
+                    self._remember(key,result)
+                    self.hits += 1
+                    return _copy(result)
+            self.misses += 1
+            return None
+
+    def put(self,key,result):
+        """Store result, a plan or False, for key."""
+        with self._lock:
+            self._remember(key,_copy(result))
+            if self._db is not None:
+                blob = pickle.dumps(result,pickle.HIGHEST_PROTOCOL)
+                with self._db:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO plans VALUES (?,?)',
+                        (key,sqlite3.Binary(blob)))
+
+    def _remember(self,key,result):
+        self._plans.pop(key,None)
+        self._plans[key] = result
+        if len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+
+    def domain_changed(self):
+        """Work out the digest of the domain again on the next lookup."""
+        self._domain = None
+
+    def clear(self):
+        """Forget all plans, on disk too, and reset the counters."""
+        with self._lock:
+            self._plans.clear()
+            self._domain = None
+            self.hits = 0
+            self.misses = 0
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('DELETE FROM plans')
+
+    def close(self):
+        """Close the database, if there is one."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __repr__(self):
+        return 'PlanCache(maxsize={}, size={}, hits={}, misses={})'.format(
+            self.maxsize,len(self),self.hits,self.misses)
+
+
+def _copy(result):
+    """Plans are lists, which the caller may change; False is shared."""
+    return list(result) if result else result
+
+def _variables(state):
+    return {name:val for (name,val) in vars(state).items()
+            if name != '__name__'}
+
+
+############################################################
+# Canonical texts and digests
+
+def canonical(val):
+    """
+    Return a text for val that is the same for equal values in any process:
+    mappings and sets have their entries sorted, and other objects with
+    variables are written as their class name and their variables (leaving
+    out __name__, as for states and goals). A pyhop.rigid.Rigid is written
+    as a digest of its text, which is worked out only once.
+    """
+    if isinstance(val,(str,bytes,int,float,bool,type(None))):
+        return repr(val)
+    if isinstance(val,tuple):
+        return '(' + ','.join(canonical(x) for x in val) + ',)'
+    if isinstance(val,list):
+        return '[' + ','.join(canonical(x) for x in val) + ']'
+    if isinstance(val,Rigid):
+        # it never changes, so its text is worked out (and shortened to a
+        # digest) only once
+        if val._canonical is None:
+            val._canonical = 'Rigid' + hashlib.sha1(
+                canonical(val._data).encode('utf-8')).hexdigest()
+        return val._canonical
+    if isinstance(val,Mapping):
+        return '{' + ','.join(sorted(canonical(k) + ':' + canonical(v)
+                                     for (k,v) in val.items())) + '}'
+    if isinstance(val,(set,frozenset)):
+        return '{' + ','.join(sorted(canonical(x) for x in val)) + '/}'
+    if hasattr(val,'__dict__') and not isinstance(val,type):
+        return '{}{}'.format(type(val).__name__,canonical(_variables(val)))
+    return repr(val)
+
+def domain_digest(operators,methods):
+    """
+    Return a digest of the names and code of the operators and methods (or
+    of a CompiledDomain, with methods None).
+    """
+    if methods is None:
+        (operators,methods) = (operators.operators,operators.methods)
+    digest = hashlib.sha1()
+    for name in sorted(operators):
+        digest.update('op {} {}\n'.format(
+            name,_function_text(operators[name])).encode('utf-8'))
+    for name in sorted(methods):
+        for method in methods[name]:
+            digest.update('method {} {}\n'.format(
+                name,_function_text(method)).encode('utf-8'))
+    return digest.hexdigest()
+
+def _function_text(function):
+    name = getattr(function,'__qualname__',getattr(function,'__name__',''))
+    code = getattr(function,'__code__',None)
+    if code is None:
+        return '{}.{}'.format(getattr(function,'__module__',''),name)
+    cells = [_function_text(c) if isinstance(c,types.FunctionType)
+             else canonical(c)
+             for c in (cell.cell_contents
+                       for cell in (function.__closure__ or ()))]
+    return '{}.{} {} {}'.format(function.__module__,name,_code_text(code),
+                                cells)
+
+def _code_text(code):
+    """A text for a code object, and for the code objects in it."""
+    consts = [_code_text(c) if isinstance(c,types.CodeType) else canonical(c)
+              for c in code.co_consts]
+    return '{} {} {}'.format(hashlib.sha1(code.co_code).hexdigest(),
+                             code.co_names,consts)
@@ -0,0 +1,237 @@
+"""
+Repairing plans whose execution has gone wrong.
+
+When the world doesn't turn out as a plan predicted, calling plan again
+searches for the whole of the rest of the plan. plan_tree (below) plans
+like hop.plan but also keeps the decomposition that the plan came from:
+which method decomposed each method task into which subtasks, and which
+actions each one led to. If, after k actions have been carried out, the
+state is not the one that was predicted, repair checks the rest of the
+decomposition against it, and searches again only for the parts that no
+longer hold, keeping the rest of the plan:
+
+    tree = repair.plan_tree(state,tasks,operators,methods)
+    ...carry out tree.plan[:k], and observe the state...
+    tree = tree.repair(k,observed)
+    ...carry on with tree.plan[k:]
+
+The check goes through the steps of the decomposition that come after the
+k'th action, in order, starting from (a copy of) the observed state: it
+applies each action's operator, and calls each method again to see that
+it still gives the same subtasks. At the first step that fails, repair
+searches again for the smallest task around it that hasn't been started
+yet, puts the steps that this search takes in place of the task's old
+ones, and carries on checking after them. If none of the unstarted tasks
+around the failed step can be done on its own, repair searches for all of
+the tasks that remain after action k together, as plan would; if that
+fails too, it returns its result (False or a BudgetExhausted).
+
+So the repaired plan is one that the methods would still choose in the
+observed state, as a plan from scratch is, though not always the same one:
+if an earlier method of a task would now work too, the search would try it
+first, but the check only asks whether the method that was used still
+works.
+
+The decomposition is kept as the list of steps along the path that the
+search took to the plan, in the order it took them: (task,subtasks,method)
+for a method task, and (task,None,None) for an action. A task that was
+decomposed covers a run of consecutive steps, so replacing its part of the
+plan means replacing that run.
+"""
+import copy
+
+from pyhop import hop
+from pyhop.cow import cow_state
+from pyhop.domain import Domain, compile_domain
+from pyhop.engine import BudgetExhausted, _decompositions
+from pyhop.helpers import from_linked, to_linked
+from pyhop.trace import TeeTracer, Tracer
+
+
+def plan_tree(state,tasks,operators,methods=None,**options):
+    """
+    Like hop.plan, but return a PlanTree for the plan that was found (or
+    False or a BudgetExhausted, as hop.plan does). The options are those of
+    hop.plan, other than workers and plan_cache, and are used again when
+    the plan is repaired.
+    """
+    for name in ('workers','plan_cache'):
+        if options.get(name) is not None:
+            raise ValueError('plan_tree cannot be given {}'.format(name))
+    if isinstance(operators,Domain):
+        domain = operators.snapshot()
+    elif methods is not None:
+        domain = compile_domain(operators,methods,check=False)
+    else:
+        domain = operators
+    (result,steps) = _search(state,list(tasks),domain,options)
+    if result is False or isinstance(result,BudgetExhausted):
+        return result
+    return PlanTree(list(tasks),steps,domain,options)
+
+
+class PlanTree(object):
+    """
+    A plan for tasks, and the decomposition it came from:
+    - plan is the list of actions;
+    - steps is the list of (task,subtasks,method) decomposition steps, with
+      subtasks and method None for an action.
+    """
+
+    def __init__(self,tasks,steps,domain,options):
+        self.tasks = tasks
+        self.steps = steps
+        self._domain = domain
+        self._options = options
+        # For each step, the number of actions before it, the step of the
+        # innermost method task it is part of (None for a top-level task),
+        # and the linked list of tasks still to do when the search reached
+        # it; for each method task's step, the index of the step after its
+        # part; and the index of each action's step.
+        self.plan = []
+        self._before = []
+        self._owner = []
+        self._agenda = []
+        self._end_step = {}
+        self._action_step = []
+        agenda = to_linked(tasks)
+        owners = to_linked([None]*len(tasks))
+        size = len(tasks)
+        unfinished = []
+        for (i,(task,subtasks,method)) in enumerate(steps):
+            (owner,later_owners) = owners
+            self._before.append(len(self.plan))
+            self._owner.append(owner)
+            self._agenda.append(agenda)
+            if subtasks is None:
+                self.plan.append(task)
+                self._action_step.append(i)
+                (agenda,owners) = (agenda[1],later_owners)
+                size -= 1
+            else:
+                agenda = to_linked(subtasks,agenda[1])
+                owners = to_linked([i]*len(subtasks),later_owners)
+                unfinished.append((i,size-1))
+                size += len(subtasks) - 1
+            while unfinished and unfinished[-1][1] == size:
+                self._end_step[unfinished.pop()[0]] = i + 1
+        self._before.append(len(self.plan))
+        self._agenda.append(agenda)
+
+    def __repr__(self):
+        return 'PlanTree({} actions, {} steps)'.format(
+            len(self.plan),len(self.steps))
+
+    def repair(self,k,state):
+        """
+        Return a PlanTree whose plan starts with the first k actions of
+        this one and then does the remaining tasks from state, the state
+        observed after those k actions; or False (or a BudgetExhausted) if
+        there is no such plan.
+        """
+        tree = self
+        i = self._first_step(k)
+        # the state after each number of actions, as far as it is known
+        states = {k:cow_state(state)}
+        while True:
+            failed = tree._first_failure(i,states)
+            if failed is None:
+                return tree
+            repaired = None
+            owner = failed
+            if tree.steps[failed][1] is None:
+                owner = tree._owner[failed]
+            while owner is not None and tree._before[owner] >= k:
+                (result,steps) = _search(states[tree._before[owner]],
+                                         [tree.steps[owner][0]],
+                                         tree._domain,tree._options)
+                if result is not False and not isinstance(result,
+                                                          BudgetExhausted):
+                    repaired = tree._replaced(owner,tree._end_step[owner],
+                                              steps)
+                    i = owner
+                    break
+                owner = tree._owner[owner]
+            if repaired is None:
+                i = tree._first_step(k)
+                (result,steps) = _search(states[k],
+                                         from_linked(tree._agenda[i]),
+                                         tree._domain,tree._options)
+                if result is False or isinstance(result,BudgetExhausted):
+                    return result
+                repaired = tree._replaced(i,len(tree.steps),steps)
+            # the steps before i are as they were, and so are the states
+            # that they lead to, so checking the new steps can begin there
+            tree = repaired
+
+    def _first_step(self,k):
+        """Return the index of the first step after the k'th action."""
+        return 0 if k == 0 else self._action_step[k-1] + 1
+
+    def _first_failure(self,i,states):
+        """
+        Check the steps from the i'th on, starting from the state in states
+        for the number of actions before it, and return the index of the
+        first one that fails (None if none does). states is updated with the
+        state after each action that is applied.
+        """
+        n = self._before[i]
+        state = states[n]
+        table = self._domain.table
+        for j in range(i,len(self.steps)):
+            (task,subtasks,method) = self.steps[j]
+            if subtasks is None:
+                newstate = table[task[0]](copy.deepcopy(state),*task[1:])
+                if not newstate:
+                    return j
+                state = newstate
+                n += 1
+                states[n] = state
+            elif not _gives(method,state,task,subtasks):
+                return j
+        return None
+
+    def _replaced(self,start,end,steps):
+        """Return a PlanTree with steps in place of self.steps[start:end]."""
+        return PlanTree(self.tasks,self.steps[:start]+steps+self.steps[end:],
+                        self._domain,self._options)
+
+
+def _gives(method,state,task,subtasks):
+    """True if method gives subtasks for task in state."""
+    for (_,alternative) in _decompositions((method,),state,task[1:]):
+        if alternative != False and list(alternative) == subtasks:
+            return True
+    return False
+
+
+class _Recorder(Tracer):
+    """Keep the steps on the path to the current node of the search."""
+
+    def __init__(self):
+        self.path = []
+        self.steps = None
+
+    def operator_applied(self,depth,task,newstate):
+        if newstate:
+            del self.path[depth:]
+            self.path.append((task,None,None))
+
+    def method_tried(self,depth,task,method,subtasks):
+        del self.path[depth:]
+        self.path.append((task,list(subtasks),method))
+
+    def plan_found(self,depth,plan):
+        self.steps = self.path[:depth]
+
+
+def _search(state,tasks,domain,options):
+    """Return hop.plan's result for tasks in state, and its steps."""
+    recorder = _Recorder()
+    options = dict(options)
+    if options.get('tracer') is not None:
+        options['tracer'] = TeeTracer(recorder,options['tracer'])
+    else:
+        options['tracer'] = recorder
+    result = hop.plan(state,tasks,domain,**options)
+    return (result,recorder.steps)
@@ -0,0 +1,86 @@
+"""
+Rigid (static) state variables.
+
+Some state variables never change during planning: in simple_travel.py,
+no operator writes state.dist, and in a road network such tables can be
+most of the state. The planner doesn't know that, so it copies them along
+with everything else: deep copies copy them for every operator, and a
+copy-on-write state copies each row the first time a new state reads it.
+Wrapping such a variable's value in Rigid tells the planner that it can't
+change:
+
+    state1.dist = Rigid({'home':{'park':8}, 'park':{'home':8}})
+
+Every state in the search then shares the one Rigid object, which copying
+returns as it is, and its fingerprint (see pyhop.fingerprint) and its
+canonical text (see pyhop.plancache) are computed once, the first time
+they are needed. The operators and methods read it just as they would the
+dict (state.dist['home']['park']), but it has no way to write an entry, so
+an operator that tries to gets a TypeError. The values inside it, such as
+the rows of dist, are the dicts it was given, and must not be changed
+either.
+"""
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from pyhop.fingerprint import fingerprint
+
+
+class Rigid(Mapping):
+    """
+    A read-only mapping with the entries of data, shared rather than copied
+    by every state that has it.
+    """
+    __slots__ = ('_data','_fp','_canonical')
+
+    def __init__(self,data=()):
+        self._data = dict(data)
+        self._fp = None
+        self._canonical = None
+
+    def __getitem__(self,key):
+        return self._data[key]
+
+    def get(self,key,default=None):
+        return self._data.get(key,default)
+
+    def __contains__(self,key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def fingerprint(self):
+        """Return the fingerprint of the entries, computed once."""
+        if self._fp is None:
+            self._fp = fingerprint(self._data)
+        return self._fp
+
+    def __eq__(self,other):
+        if other is self:
+            return True
+        if isinstance(other,Rigid):
+            return self._data == other._data
+        return Mapping.__eq__(self,other)
+
+    def __ne__(self,other):
+        return not self == other
+
+    __hash__ = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self,memo):
+        return self
+
+    def __reduce__(self):
+        return (Rigid,(self._data,))
+
+    def __repr__(self):
+        return repr(self._data)
@@ -0,0 +1,151 @@
+"""
+Search statistics for Pyhop.
+
+To find out where a call to plan spends its time, pass it a SearchStats
+object:
+
+    stats = SearchStats()
+    hop.plan(state,tasks,operators,methods,stats=stats)
+    print(stats)
+
+The planner fills in the counters as it searches. It times the operators
+and methods by calling them through timing wrappers, which it builds only
+when it is given a SearchStats object, so a search without one runs the
+same code as before.
+"""
+import copy
+import functools
+from types import GeneratorType
+
+try:
+    from time import perf_counter as clock
+except ImportError:
+    from time import time as clock
+
+
+class SearchStats(object):
+    """
+    Counters and timings for one or more searches:
+    - nodes is the number of search nodes (task lists) the planner visited;
+    - operator_applications is the number of times an operator was applied,
+      and operator_failures how many of those returned False;
+    - method_calls[taskname] is the number of times a method was called for
+      a task named taskname, and method_failures[taskname] how many of
+      those calls returned False;
+    - backtracks is the number of dead ends the search backed up from;
+    - max_depth is the greatest search depth reached;
+    - operator_time[name] and method_time[name] are the seconds spent in
+      the operator or method function with that name;
+    - copy_time is the seconds spent giving the operators their states,
+      by copying them or, when planning in place, by undoing changes;
+    - time is the total number of seconds spent planning.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.operator_applications = 0
+        self.operator_failures = 0
+        self.method_calls = {}
+        self.method_failures = {}
+        self.backtracks = 0
+        self.max_depth = 0
+        self.operator_time = {}
+        self.method_time = {}
+        self.copy_time = 0.0
+        self.time = 0.0
+
+    def as_dict(self):
+        """Return the statistics as a dict of plain Python values."""
+        return {name:(dict(val) if isinstance(val,dict) else val)
+                for (name,val) in vars(self).items()}
+
+    def __repr__(self):
+        return 'SearchStats({})'.format(self.as_dict())
+
+    def __str__(self):
+        lines = ['{:<24}{}'.format(name,getattr(self,name)) for name in
+                 ('nodes','operator_applications','operator_failures',
+                  'backtracks','max_depth')]
+        lines += ['{:<24}{:.6f}'.format(name,getattr(self,name))
+                  for name in ('copy_time','time')]
+        for (title,table) in (('METHOD CALLS:',self.method_calls),
+                              ('OPERATOR SECONDS:',self.operator_time),
+                              ('METHOD SECONDS:',self.method_time)):
+            if table:
+                lines.append(title)
+                for name in sorted(table,key=table.get,reverse=True):
+                    if table[name]:
+                        lines.append('  {:<22}{:g}'.format(name,table[name]))
+        return '\n'.join(lines)
+
+    ########################################################
+    # Wrappers the planner uses to collect the statistics
+
+    def timed_operators(self,operators):
+        """Return a copy of operators whose functions update self."""
+        return {name:self._timed_operator(op)
+                for (name,op) in operators.items()}
+
+    def timed_methods(self,methods):
+        """Return a copy of methods whose functions update self."""
+        return {task_name:[self._timed_method(task_name,m) for m in mlist]
+                for (task_name,mlist) in methods.items()}
+
+    def timed_copy(self,copier=copy.deepcopy):
+        """Return a version of copier that adds its time to copy_time."""
+        @functools.wraps(copier)
+        def timed(*args):
+            start = clock()
+            try:
+                return copier(*args)
+            finally:
+                self.copy_time += clock() - start
+        return timed
+
+    def _timed_operator(self,op):
+        name = op.__name__
+        self.operator_time.setdefault(name,0.0)
+        @functools.wraps(op)
+        def timed(state,*args):
+            start = clock()
+            try:
+                result = op(state,*args)
+            finally:
+                self.operator_time[name] += clock() - start
+            self.operator_applications += 1
+            if not result:
+                self.operator_failures += 1
+            return result
+        return timed
+
+    def _timed_method(self,task_name,method):
+        name = method.__name__
+        self.method_time.setdefault(name,0.0)
+        self.method_calls.setdefault(task_name,0)
+        self.method_failures.setdefault(task_name,0)
+        @functools.wraps(method)
+        def timed(state,*args):
+            start = clock()
+            try:
+                result = method(state,*args)
+            finally:
+                self.method_time[name] += clock() - start
+            self.method_calls[task_name] += 1
+            if result.__class__ is GeneratorType:
+                return self._timed_alternatives(name,result)
+            if result == False:
+                self.method_failures[task_name] += 1
+            return result
+        return timed
+
+    def _timed_alternatives(self,name,alternatives):
+        """Yield what a generator method yields, timing each step."""
+        while True:
+            start = clock()
+            try:
+                subtasks = next(alternatives)
+            except StopIteration:
+                return
+            finally:
+                self.method_time[name] += clock() - start
+            yield subtasks
@@ -0,0 +1,235 @@
+"""
+Tracing the planner's search.
+
+A tracer is an object with one method per kind of event in the search. The
+planner calls those methods as the events happen, if it has been given a
+tracer; if it hasn't, each place where an event could happen costs a single
+test of a local variable against None, and nothing is formatted or printed.
+
+Tracer is the base class, whose methods do nothing, so a subclass need only
+override the events it cares about. The events are:
+- start(state,tasks): plan is called with state and tasks;
+- enter(depth,tasks): the search visits a node; tasks is the linked list
+  (see helpers.to_linked) of the tasks still to do;
+- operator_applied(depth,task,newstate): an operator was applied for task,
+  and returned newstate (False if it failed);
+- method_instance(depth,task): the search starts decomposing task;
+- method_tried(depth,task,method,subtasks): method decomposed task into
+  subtasks;
+- method_failed(depth,task,method): method was not applicable to task;
+- unknown_task(depth,task): there is no operator or method for task;
+- backtrack(depth): the search hit a dead end at depth and backs up;
+- plan_found(depth,plan): the search found plan;
+- finish(result): plan is about to return result.
+
+PrintTracer prints the messages that plan's verbose argument asks for, and
+JSONLinesTracer writes the events to a file for analysis after the run.
+"""
+from __future__ import print_function
+import json
+
+from pyhop.helpers import from_linked, print_state
+
+
+class Tracer(object):
+    """A tracer that ignores every event."""
+
+    def start(self,state,tasks): pass
+    def enter(self,depth,tasks): pass
+    def operator_applied(self,depth,task,newstate): pass
+    def method_instance(self,depth,task): pass
+    def method_tried(self,depth,task,method,subtasks): pass
+    def method_failed(self,depth,task,method): pass
+    def unknown_task(self,depth,task): pass
+    def backtrack(self,depth): pass
+    def plan_found(self,depth,plan): pass
+    def finish(self,result): pass
+
+
+class PrintTracer(Tracer):
+    """
+    Print the messages for plan's verbose argument:
+    - if verbose = 1, the initial parameters and the answer;
+    - if verbose = 2, also a message on each node of the search;
+    - if verbose = 3, also info about what it's computing.
+    """
+
+    def __init__(self,verbose):
+        self.verbose = verbose
+
+    def start(self,state,tasks):
+        if self.verbose>0: print(
+            '** hop, verbose={}: **\n   state = {}\n   tasks = {}'.format(
+                self.verbose, state.__name__, tasks))
+
+    def enter(self,depth,tasks):
+        if self.verbose>1:
+            print('depth {} tasks {}'.format(depth,from_linked(tasks)))
+
+    def operator_applied(self,depth,task,newstate):
+        if self.verbose>2:
+            print('depth {} action {}'.format(depth,task))
+            print('depth {} new state:'.format(depth))
+            print_state(newstate)
+
+    def method_instance(self,depth,task):
+        if self.verbose>2:
+            print('depth {} method instance {}'.format(depth,task))
+
+    def method_tried(self,depth,task,method,subtasks):
+        if self.verbose>2:
+            print('depth {} new tasks: {}'.format(depth,subtasks))
+
+    def method_failed(self,depth,task,method):
+        if self.verbose>2:
+            print('depth {} new tasks: {}'.format(depth,False))
+
+    def unknown_task(self,depth,task):
+        if self.verbose>2:
+            print('depth {} returns failure'.format(depth))
+
+    def plan_found(self,depth,plan):
+        if self.verbose>2:
+            print('depth {} returns plan {}'.format(depth,plan))
+
+    def finish(self,result):
+        if self.verbose>0: print('** result =',result,'\n')
+
+
+class TeeTracer(Tracer):
+    """Pass every event on to each of several tracers."""
+
+    def __init__(self,*tracers):
+        self.tracers = tracers
+
+    def _event(name):
+        def event(self,*args):
+            for tracer in self.tracers:
+                getattr(tracer,name)(*args)
+        event.__name__ = name
+        return event
+
+    start = _event('start')
+    enter = _event('enter')
+    operator_applied = _event('operator_applied')
+    method_instance = _event('method_instance')
+    method_tried = _event('method_tried')
+    method_failed = _event('method_failed')
+    unknown_task = _event('unknown_task')
+    backtrack = _event('backtrack')
+    plan_found = _event('plan_found')
+    finish = _event('finish')
+    del _event
+
+
+class JSONLinesTracer(Tracer):
+    """
+    Write each event to a file as a line of JSON, such as
+        {"event": "method_tried", "depth": 3, "task": "('get', 'a')",
+         "method": "get_by_pickup", "subtasks": "[('pickup_task', 'a')]"}
+    Tasks, plans and subtask lists are written as their repr strings, and
+    states are left out unless states is true. The lines are buffered and
+    written buffer_size at a time, so a trace of a long run costs little
+    more than building the lines; call close() (or use the tracer as a
+    context manager) to write out the rest. file is a file object, or the
+    name of a file to create.
+    """
+
+    def __init__(self,file,buffer_size=10000,states=False):
+        if isinstance(file,str):
+            file = open(file,'w')
+            self._owns_file = True
+        else:
+            self._owns_file = False
+        self.file = file
+        self.buffer_size = buffer_size
+        self.states = states
+        self._lines = []
+
+    def _write(self,event):
+        self._lines.append(json.dumps(event))
+        if len(self._lines) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write out the buffered lines."""
+        if self._lines:
+            self.file.write('\n'.join(self._lines) + '\n')
+            del self._lines[:]
+        self.file.flush()
+
+    def close(self):
+        """Write out the buffered lines and close the file if we opened it."""
+        self.flush()
+        if self._owns_file:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc_info):
+        self.close()
+
+    def _state(self,state):
+        if state is False:
+            return False
+        return {name:repr(val) for (name,val) in vars(state).items()
+                if name != '__name__'}
+
+    def start(self,state,tasks):
+        event = {'event':'start', 'state':state.__name__, 'tasks':repr(tasks)}
+        if self.states:
+            event['variables'] = self._state(state)
+        self._write(event)
+
+    def enter(self,depth,tasks):
+        self._write({'event':'enter', 'depth':depth,
+                     'task':repr(tasks[0]) if tasks is not None else None})
+
+    def operator_applied(self,depth,task,newstate):
+        event = {'event':'operator_applied', 'depth':depth,
+                 'task':repr(task), 'success':bool(newstate)}
+        if self.states:
+            event['state'] = self._state(newstate)
+        self._write(event)
+
+    def method_instance(self,depth,task):
+        self._write({'event':'method_instance', 'depth':depth,
+                     'task':repr(task)})
+
+    def method_tried(self,depth,task,method,subtasks):
+        self._write({'event':'method_tried', 'depth':depth,
+                     'task':repr(task), 'method':method.__name__,
+                     'subtasks':repr(subtasks)})
+
+    def method_failed(self,depth,task,method):
+        self._write({'event':'method_failed', 'depth':depth,
+                     'task':repr(task), 'method':method.__name__})
+
+    def unknown_task(self,depth,task):
+        self._write({'event':'unknown_task', 'depth':depth,
+                     'task':repr(task)})
+
+    def backtrack(self,depth):
+        self._write({'event':'backtrack', 'depth':depth})
+
+    def plan_found(self,depth,plan):
+        self._write({'event':'plan_found', 'depth':depth, 'plan':repr(plan)})
+
+    def finish(self,result):
+        self._write({'event':'finish', 'result':repr(result)})
+        self.flush()
+
+
+def read_trace(file):
+    """
+    Iterate over the events in a file written by JSONLinesTracer, as dicts.
+    file is a file object or the name of a file.
+    """
+    if isinstance(file,str):
+        with open(file) as f:
+            for line in f:
+                yield json.loads(line)
+    else:
+        for line in file:
+            yield json.loads(line)
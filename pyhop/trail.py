@@ -0,0 +1,212 @@
+"""
+Undo-log (trail-based) backtracking for Pyhop.
+
+Instead of giving every operator a fresh copy of the state, this engine lets
+the operators modify a single state in place. Every write to the state, or
+to one of its dict variables, is recorded on a trail, in the way Prolog
+engines and SAT solvers record variable bindings, and backtracking rolls the
+trail back to the point where the failed branch began. When a decomposition
+is deep and backtracks little, a planning step then allocates almost nothing.
+
+hop.plan(..., in_place=True) uses this engine. It finds the same plans as
+the default one, provided the operators change the state only by assigning
+to its variables (state.holding = b, or state.pos = {...}, whose new dict
+is recorded from then on too) or to the entries of its dict variables
+(state.pos[b] = c), and return the state they were given. Both are true of
+every operator that comes with Pyhop.
+"""
+import copy
+
+from pyhop.fingerprint import (
+    known_fingerprint, mapping_fingerprint, set_fingerprint, toggle_entry)
+
+
+_ABSENT = object()
+
+
+class _Removed(object):
+    """
+    The old value of an entry that was deleted, and the entry's position
+    in its dict, so that undoing the deletion can put it back where it was
+    (and the dict is iterated in the same order as in a copy that never
+    lost the entry).
+    """
+    __slots__ = ('val','index')
+
+    def __init__(self,d,key):
+        self.val = d[key]
+        self.index = 0
+        for k in d:
+            if k == key:
+                break
+            self.index += 1
+
+
+class TrailDict(dict):
+    """
+    A dict that records the old value of each entry it changes, and keeps
+    its fingerprint (see pyhop.fingerprint) up to date.
+    """
+    __slots__ = ('_trail', '_fp', '_owner')
+
+    def __init__(self,data,trail):
+        dict.__init__(self)
+        self._trail = trail
+        self._owner = None
+        for (k,v) in data.items():
+            dict.__setitem__(self,k,self._adopt(k,v))
+        self._fp = known_fingerprint(self)
+
+    def _adopt(self,key,val):
+        """Return the value to store for key: val, or a TrailDict of it."""
+        if type(val) is dict or type(val) is TrailDict:
+            val = TrailDict(val,self._trail)
+            val._owner = (self,key)
+        return val
+
+    def _put(self,key,val):
+        """
+        Set self[key] to val, delete it if val is _ABSENT, or put it back
+        where it was if val is a _Removed, and update the fingerprint,
+        without recording anything on the trail.
+        """
+        fp = self._fp
+        old = dict.get(self,key,_ABSENT)
+        if old is not _ABSENT:
+            fp = toggle_entry(fp,key,old)
+        if val is _ABSENT:
+            dict.__delitem__(self,key)
+        else:
+            if type(val) is _Removed:
+                val = _reinsert(self,key,val)
+            else:
+                dict.__setitem__(self,key,val)
+            fp = toggle_entry(fp,key,val)
+        set_fingerprint(self,fp)
+
+    def __setitem__(self,key,val):
+        self._trail.append((self,key,dict.get(self,key,_ABSENT)))
+        self._put(key,self._adopt(key,val))
+
+    def __delitem__(self,key):
+        self._trail.append((self,key,_Removed(self,key)))
+        self._put(key,_ABSENT)
+
+    def pop(self,key,*default):
+        if key in self:
+            val = self[key]
+            del self[key]
+            return val
+        return dict.pop(self,key,*default)
+
+    def popitem(self):
+        (key,val) = dict.popitem(self)
+        self._trail.append((self,key,val))
+        set_fingerprint(self,toggle_entry(self._fp,key,val))
+        return (key,val)
+
+    def setdefault(self,key,default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self,*args,**kwargs):
+        for (k,v) in dict(*args,**kwargs).items():
+            self[k] = v
+
+    def clear(self):
+        while self:
+            self.popitem()
+
+    def fingerprint(self):
+        """
+        Return the fingerprint of the contents, in O(1) time unless it is
+        unknown (see pyhop.fingerprint).
+        """
+        if self._fp is None:
+            self._fp = mapping_fingerprint(self)
+        return self._fp
+
+    def __deepcopy__(self,memo):
+        return {k:copy.deepcopy(v,memo) for (k,v) in self.items()}
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class Trail(list):
+    """
+    The undo log. Each entry is (d, key, old) for a write to d[key], where d
+    is the __dict__ of a state, or an object with a method _put(key,old)
+    that undoes the write, such as a TrailDict; old is the previous value
+    of d[key] (or _ABSENT if it had none, or a _Removed if the write
+    deleted it).
+    """
+
+    def mark(self):
+        """Remember the current point, to which undo can return later."""
+        return len(self)
+
+    def undo(self,mark):
+        """Undo every write recorded since mark was taken."""
+        while len(self) > mark:
+            (d,key,old) = self.pop()
+            if type(d) is not dict:
+                d._put(key,old)
+            elif old is _ABSENT:
+                dict.pop(d,key,None)
+            elif type(old) is _Removed:
+                _reinsert(d,key,old)
+            else:
+                dict.__setitem__(d,key,old)
+
+
+def _reinsert(d,key,removed):
+    """
+    Put the entry that removed records back into the dict d, at its old
+    position, and return its value. The later writes to d have been undone
+    by then, so the other keys are in the order they were in after the
+    deletion.
+    """
+    if removed.index >= len(d):
+        dict.__setitem__(d,key,removed.val)
+        return removed.val
+    items = list(dict.items(d))
+    items.insert(removed.index,(key,removed.val))
+    dict.clear(d)
+    for (k,v) in items:
+        dict.__setitem__(d,k,v)
+    return removed.val
+
+
+def _setattr(self,name,val):
+    if type(val) is dict or type(val) is TrailDict:
+        val = TrailDict(val,self._trail)
+    variables = vars(self)
+    self._trail.append((variables,name,variables.get(name,_ABSENT)))
+    variables[name] = val
+
+def _delattr(self,name):
+    variables = vars(self)
+    self._trail.append((variables,name,_Removed(variables,name)))
+    del variables[name]
+
+def trail_state(state,trail):
+    """
+    Return a copy of state that records all of its writes on trail: both
+    the writes to its dict variables and the (re)binding of its variables.
+    A state with a trail_copy method (see pyhop.schema) makes the copy
+    itself, and so does a variable with one (see pyhop.arrays).
+    """
+    if hasattr(state,'trail_copy'):
+        return state.trail_copy(trail)
+    new = copy.deepcopy(state)
+    for (name,val) in vars(new).items():
+        if type(val) is dict:
+            vars(new)[name] = TrailDict(val,trail)
+        elif hasattr(val,'trail_copy'):
+            vars(new)[name] = val.trail_copy(trail)
+    cls = state.__class__
+    new.__class__ = type(cls.__name__,(cls,),{
+        '__setattr__':_setattr, '__delattr__':_delattr, '_trail':trail})
+    return new
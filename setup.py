@@ -12,4 +12,5 @@ setup(name=meta.display_name,
       license=meta.license,
       packages=find_packages(),
       long_description=meta.long_description,
-      install_requires=meta.requires)
+      install_requires=meta.requires,
+      extras_require=meta.extras)
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+from pyhop import aio, hop
+from pyhop.domain import compile_domain
+
+
+def _step(state,n):
+    state.n = n
+    return state
+
+def _count(state,n):
+    if state.n >= n:
+        return []
+    return [('step',state.n+1),('count',n)]
+
+def _forever(state):
+    return [('step',state.n),('forever',)]
+
+DOMAIN = compile_domain({'step':_step},
+                        {'count':[_count],'forever':[_forever]})
+
+
+class AioTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = hop.State('s')
+        self.state.n = 0
+
+    def run_coroutine(self,coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            asyncio.set_event_loop(loop)
+            return loop.run_until_complete(coroutine)
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def test_same_plan_as_hop(self):
+        result = self.run_coroutine(
+            aio.plan(self.state,[('count',50)],DOMAIN,None,pause_every=7))
+        self.assertEqual(result,hop.plan(self.state,[('count',50)],DOMAIN))
+
+    def test_compiled_domain_without_methods(self):
+        result = self.run_coroutine(aio.plan(self.state,[('count',3)],DOMAIN))
+        self.assertEqual(result,[('step',1),('step',2),('step',3)])
+
+    def test_timeout(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            self.run_coroutine(aio.plan(self.state,[('forever',)],DOMAIN,
+                                        None,pause_every=100,timeout=0.05))
+
+
+class SeekPlanTest(unittest.TestCase):
+
+    def test_seek_plan_is_still_in_hop(self):
+        state = hop.State('s')
+        state.n = 0
+        self.assertEqual(
+            hop.seek_plan(state,[('count',2)],DOMAIN,None,[],0),
+            [('step',1),('step',2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import copy
+import unittest
+
+from pyhop import hop
+from pyhop.fingerprint import state_fingerprint
+from pyhop.trail import Trail, trail_state
+
+try:
+    import numpy
+    from pyhop.arrays import ArrayVar
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None,'needs NumPy')
+class ArrayVarTest(unittest.TestCase):
+
+    def test_reads_and_writes_like_a_dict(self):
+        dist = ArrayVar.from_dict({'home':{'park':8},'park':{'home':8}})
+        self.assertEqual(dist['home']['park'],8)
+        self.assertEqual(dist['home','park'],8)
+        dist['park','home'] = 3
+        self.assertEqual(dist['park']['home'],3)
+        cash = ArrayVar([['me','you']],[20,35])
+        self.assertEqual(cash.where(cash.array >= 30),['you'])
+
+    def test_equality_agrees_with_fingerprint(self):
+        a = ArrayVar([['me','you']],[20,35])
+        b = copy.deepcopy(a)
+        self.assertEqual(a,b)
+        self.assertEqual(a.fingerprint(),b.fingerprint())
+        self.assertNotEqual(a,{'me':20,'you':35})
+        self.assertNotEqual(a,ArrayVar([['me','you']],[20,35],dtype=float))
+        zero = ArrayVar([['x']],[0.0])
+        self.assertEqual(zero,ArrayVar([['x']],[-0.0]))
+        self.assertEqual(zero.fingerprint(),
+                         ArrayVar([['x']],[-0.0]).fingerprint())
+
+    def test_equal_states_have_equal_fingerprints(self):
+        s = hop.State('s')
+        s.cash = ArrayVar([['me']],[20])
+        u = hop.State('u')
+        u.cash = {'me':20}
+        self.assertNotEqual(s,u)
+        t = copy.deepcopy(s)
+        self.assertEqual(s,t)
+        self.assertEqual(state_fingerprint(s),state_fingerprint(t))
+
+    def test_trail_undoes_writes(self):
+        s = hop.State('s')
+        s.cash = ArrayVar([['me']],[20])
+        trail = Trail()
+        new = trail_state(s,trail)
+        mark = trail.mark()
+        new.cash['me'] = 5
+        trail.undo(mark)
+        self.assertEqual(new.cash['me'],20)
+
+
+if __name__ == '__main__':
+    unittest.main()
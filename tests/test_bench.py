@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyhop import bench, hop
+
+
+class BenchTest(unittest.TestCase):
+
+    def test_problems_are_solved(self):
+        for name in bench.DOMAINS:
+            result = bench.run(name,12,repeat=1)
+            self.assertTrue(result['found'])
+            self.assertGreater(result['plan_length'],0)
+
+    def test_modes_find_the_same_plan(self):
+        (state,tasks) = bench.blocks_problem(15,seed=3)
+        plans = [hop.plan(state,tasks,bench.BLOCKS,**options)
+                 for options in bench.MODES.values()]
+        for plan in plans[1:]:
+            self.assertEqual(plan,plans[0])
+
+    def test_empty_plan_is_found(self):
+        result = bench.run('travel',1,repeat=1)
+        self.assertTrue(result['found'])
+        self.assertEqual(result['plan_length'],0)
+
+    def test_budget_exhausted_is_not_found(self):
+        result = bench.run('blocks',30,repeat=1,max_nodes=5)
+        self.assertFalse(result['found'])
+        self.assertIsNone(result['plan_length'])
+
+    def test_density(self):
+        sparse = bench.run('travel',30,repeat=1,density=2)
+        self.assertEqual(sparse['density'],2)
+        self.assertEqual(bench.run('travel',30,repeat=1)['density'],4)
+        self.assertIsNone(bench.run('blocks',10,repeat=1)['density'])
+        (state,tasks) = bench.travel_problem(30,density=2)
+        self.assertEqual(sparse['plan_length'],
+                         len(hop.plan(state,tasks,bench.TRAVEL)))
+
+    def test_density_flag(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp,'results.jsonl')
+            self.assertEqual(bench.main(['--domains','travel','--sizes','20',
+                                         '--modes','cow','--repeat','1',
+                                         '--density','6','--out',path]),0)
+            (result,) = bench.read_results(path)
+        finally:
+            shutil.rmtree(tmp)
+        self.assertEqual((result['size'],result['density']),(20,6))
+
+    def test_regressions(self):
+        before = [{'domain':'blocks','size':10,'mode':'cow','seed':0,
+                   'p50':1.0}]
+        slower = dict(before[0],p50=1.5,density=None)
+        self.assertEqual(bench.regressions([slower],before,0.25),[slower])
+        self.assertEqual(bench.regressions([slower],before,0.75),[])
+
+    def test_regressions_match_the_density(self):
+        before = [{'domain':'travel','size':10,'mode':'cow','seed':0,
+                   'p50':1.0}]
+        slower = dict(before[0],p50=1.5,density=4)
+        self.assertEqual(bench.regressions([slower],before),[slower])
+        denser = dict(slower,density=8)
+        self.assertEqual(bench.regressions([denser],before),[])
+
+
+if __name__ == '__main__':
+    unittest.main()
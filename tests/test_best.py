@@ -0,0 +1,51 @@
+import unittest
+
+from pyhop import best, hop
+from pyhop.domain import compile_domain
+
+
+def _take(state,route):
+    state.at = 'there'
+    return state
+
+def _by_taxi(state):
+    return [('take','taxi')]
+
+def _on_foot(state):
+    return [('take','walk'),('take','walk')]
+
+# hop.plan takes the taxi, the first method; walking twice is cheaper
+DOMAIN = compile_domain({'take':_take},{'go':[_by_taxi,_on_foot]})
+
+def _cost(state,route):
+    return 5 if route == 'taxi' else 1
+
+def _here():
+    state = hop.State('s')
+    state.at = 'here'
+    return state
+
+
+class BestTest(unittest.TestCase):
+
+    def test_cheapest_plan(self):
+        self.assertEqual(hop.plan(_here(),[('go',)],DOMAIN),[('take','taxi')])
+        for strategy in ('astar','bnb'):
+            result = best.plan(_here(),[('go',)],DOMAIN,cost={'take':_cost},
+                               strategy=strategy)
+            self.assertEqual(result.plan,[('take','walk')]*2)
+            self.assertEqual(result.cost,2)
+            self.assertTrue(result.optimal)
+
+    def test_unit_costs_by_default(self):
+        result = best.plan(_here(),[('go',)],DOMAIN)
+        self.assertEqual((result.plan,result.cost),([('take','taxi')],1))
+
+    def test_no_plan(self):
+        result = best.plan(_here(),[('fly',)],DOMAIN)
+        self.assertIs(result.plan,False)
+        self.assertIsNone(result.cost)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import importlib.util
+import os
+import unittest
+
+from pyhop import bench, helpers, hop
+
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))),'examples','blocks_world')
+
+def _example(name):
+    """Load examples/blocks_world/name.py, which declares into hop's domain."""
+    spec = importlib.util.spec_from_file_location(
+        '_blocks_'+name,os.path.join(EXAMPLES,name+'.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _state(pos):
+    state = hop.State('s')
+    state.pos = dict(pos)
+    state.clear = {b:True for b in pos}
+    for below in pos.values():
+        if below != 'table':
+            state.clear[below] = False
+    state.holding = False
+    return state
+
+def _goal(pos):
+    goal = hop.Goal('g')
+    goal.pos = dict(pos)
+    return goal
+
+
+class IsDoneTest(unittest.TestCase):
+
+    def setUp(self):
+        # c on b on a; the goal has b on a but c on the table
+        self.state = _state({'a':'table','b':'a','c':'b'})
+        self.goal = _goal({'b':'a','c':'table'})
+
+    def test_memo_gives_the_same_answers(self):
+        memo = {}
+        for b in ('c','b','a'):
+            self.assertEqual(
+                helpers.is_done(b,self.state,self.goal,'table',memo),
+                helpers.is_done(b,self.state,self.goal,'table'))
+        self.assertEqual(memo,{'a':True,'b':True,'c':False})
+
+    def test_memo_is_used(self):
+        memo = {'a':False}
+        self.assertFalse(helpers.is_done('b',self.state,self.goal,'table',
+                                         memo))
+        self.assertEqual(memo,{'a':False,'b':False})
+
+
+class MovebTest(unittest.TestCase):
+
+    def setUp(self):
+        self.methods = [bench.moveb_m,_example('methods1').moveb_m,
+                        _example('methods2').moveb_m]
+
+    def test_waiting_block_on_the_table_is_not_moved(self):
+        # a (on the table) and c (on b) are both waiting, for each other;
+        # moving a to the table again would change nothing, forever
+        state = _state({'a':'table','b':'table','c':'b'})
+        goal = _goal({'a':'b','b':'table','c':'a'})
+        for moveb_m in self.methods:
+            self.assertEqual(moveb_m(state,goal),
+                             [('move_one','c','table'),('move_blocks',goal)])
+
+    def test_methods_agree(self):
+        for seed in range(20):
+            (state,[(_,goal)]) = bench.blocks_problem(12,seed)
+            answers = [moveb_m(state,goal) for moveb_m in self.methods]
+            self.assertEqual(answers[1],answers[0])
+            self.assertEqual(answers[2],answers[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from pyhop import bench, hop
+
+
+class BudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        (self.state,self.tasks) = bench.blocks_problem(30,seed=1)
+
+    def test_budgets_give_budget_exhausted(self):
+        for (options,reason) in (({'max_nodes':5},'nodes'),
+                                 ({'max_depth':3},'depth'),
+                                 ({'time_limit':0},'time')):
+            result = hop.plan(self.state,self.tasks,bench.BLOCKS,**options)
+            self.assertIsInstance(result,hop.BudgetExhausted)
+            self.assertEqual(result.reason,reason)
+            self.assertFalse(result)
+            self.assertNotEqual(result,False)
+
+    def test_large_budgets_change_nothing(self):
+        self.assertEqual(hop.plan(self.state,self.tasks,bench.BLOCKS,
+                                  max_nodes=10**6,max_depth=10**6,
+                                  time_limit=60),
+                         hop.plan(self.state,self.tasks,bench.BLOCKS))
+
+
+if __name__ == '__main__':
+    unittest.main()
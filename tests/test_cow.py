@@ -0,0 +1,88 @@
+import copy
+import unittest
+
+from pyhop import hop
+from pyhop.cow import CowDict, cow_state
+from pyhop.domain import compile_domain
+
+
+class CowDictTest(unittest.TestCase):
+
+    def test_copies_are_independent(self):
+        a = CowDict({'x':1, 'y':{'z':2}})
+        b = a.copy()
+        b['x'] = 10
+        b['y']['z'] = 20
+        del a['x']
+        self.assertEqual(dict(a.items()),{'y':{'z':2}})
+        self.assertEqual(b['x'],10)
+        self.assertEqual(b['y']['z'],20)
+
+    def test_lists_stored_later_are_not_shared(self):
+        a = CowDict()
+        a['items'] = []
+        b = a.copy()
+        c = a.copy()
+        b['items'].append(1)
+        c['items'].append(2)
+        a['items'].append(3)
+        self.assertEqual(a['items'],[3])
+        self.assertEqual(b['items'],[1])
+        self.assertEqual(c['items'],[2])
+
+    def test_stored_value_is_copied(self):
+        items = [1]
+        a = CowDict()
+        a['items'] = items
+        items.append(2)
+        self.assertEqual(a['items'],[1])
+
+    def test_fingerprint_follows_writes(self):
+        a = CowDict({'x':1})
+        b = a.copy()
+        b['x'] = 2
+        b['x'] = 1
+        self.assertEqual(a.fingerprint(),b.fingerprint())
+
+
+def _add(state,x):
+    state.bag['items'].append(x)
+    return state
+
+def _init(state):
+    state.bag['items'] = []
+    return state
+
+def _fail(state):
+    return False
+
+def _check(state):
+    if state.bag['items'] == [2]:
+        return state
+    return False
+
+
+class CowPlanTest(unittest.TestCase):
+
+    def test_backtracking_undoes_changes_to_lists(self):
+        domain = compile_domain(
+            {'add':_add, 'init':_init, 'fail':_fail, 'check':_check},
+            {'top':[lambda state: [('init',),('go',)]],
+             'go':[lambda state: [('add',1),('fail',)],
+                   lambda state: [('add',2),('check',)]]})
+        state = hop.State('s')
+        state.bag = {'n':0}
+        self.assertEqual(hop.plan(state,[('top',)],domain),
+                         [('init',),('add',2),('check',)])
+        self.assertEqual(state.bag,{'n':0})
+
+    def test_cow_state_leaves_original_alone(self):
+        state = hop.State('s')
+        state.pos = {'a':'table'}
+        new = copy.deepcopy(cow_state(state))
+        new.pos['a'] = 'hand'
+        self.assertEqual(state.pos,{'a':'table'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+from pyhop import hop
+from pyhop.domain import Domain, compile_domain
+
+
+def _walk(state,a,x,y):
+    state.loc[a] = y
+    return state
+
+def _travel_by_foot(state,a,x,y):
+    return [('walk',a,x,y)]
+
+def _travel_anywhere(state,a,*places):
+    return [('walk',a,places[0],places[-1])]
+
+def _travel_home(state,a,x,y='home'):
+    return [('walk',a,x,y)]
+
+def _no_state():
+    return []
+
+def _state():
+    state = hop.State('s')
+    state.loc = {'me':'home'}
+    return state
+
+
+class CompileDomainTest(unittest.TestCase):
+
+    def test_table(self):
+        domain = compile_domain({'walk':_walk},{'travel':[_travel_by_foot]})
+        self.assertIs(domain.table['walk'],_walk)
+        self.assertEqual(domain.table['travel'],(_travel_by_foot,))
+        self.assertEqual(domain.arity,{'walk':(3,3),'travel':(3,3)})
+
+    def test_name_of_operator_and_task(self):
+        with self.assertRaises(ValueError):
+            compile_domain({'walk':_walk},{'walk':[_travel_by_foot]})
+        domain = compile_domain({'walk':_walk},{'walk':[_travel_by_foot]},
+                                check=False)
+        self.assertIs(domain.table['walk'],_walk)
+
+    def test_function_without_state(self):
+        with self.assertRaises(TypeError):
+            compile_domain({'rest':_no_state},{})
+        with self.assertRaises(TypeError):
+            compile_domain({},{'rest':[_no_state]})
+
+    def test_methods_that_disagree(self):
+        compile_domain({},{'travel':[_travel_by_foot,_travel_anywhere]})
+        domain = compile_domain({},{'travel':[_travel_home,_travel_anywhere]})
+        self.assertEqual(domain.arity['travel'],(2,3))
+        with self.assertRaises(TypeError):
+            compile_domain({},{'travel':[_travel_by_foot,
+                                         lambda state,a: []]})
+
+    def test_plan_checks_the_tasks(self):
+        domain = compile_domain({'walk':_walk},{'travel':[_travel_by_foot]})
+        for tasks in ([('travel','me','home')],
+                      [('walk','me','home','park','shop')]):
+            with self.assertRaises(TypeError):
+                hop.plan(_state(),tasks,domain)
+        self.assertEqual(
+            hop.plan(_state(),[('travel','me','home','park')],domain),
+            [('walk','me','home','park')])
+
+
+class DomainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.domain = Domain('travel')
+        self.domain.declare_operators(_walk)
+        self.domain.declare_methods('travel',_travel_by_foot)
+
+    def test_snapshot_reused_until_a_declaration(self):
+        snapshot = self.domain.snapshot()
+        self.assertIs(self.domain.snapshot(),snapshot)
+        version = self.domain.version
+        self.domain.declare_methods('go',_travel_by_foot)
+        self.assertGreater(self.domain.version,version)
+        self.assertIsNot(self.domain.snapshot(),snapshot)
+
+    def test_snapshot_unaffected_by_later_declarations(self):
+        snapshot = self.domain.snapshot()
+        self.domain.declare_methods('travel',_travel_home)
+        self.domain.declare_methods('go',_travel_by_foot)
+        self.assertEqual(snapshot.table['travel'],(_travel_by_foot,))
+        self.assertNotIn('go',snapshot.table)
+        self.assertEqual(snapshot.arity['travel'],(3,3))
+        self.assertEqual(self.domain.snapshot().table['travel'],
+                         (_travel_home,))
+
+    def test_plan_with_a_domain(self):
+        # declare_operators names each operator by its function's name
+        self.assertEqual(
+            hop.plan(_state(),[('_walk','me','home','park')],self.domain),
+            [('_walk','me','home','park')])
+        with self.assertRaises(TypeError):
+            hop.plan(_state(),[('_walk','me')],self.domain)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import sys
+import unittest
+
+from pyhop import bench, hop
+
+
+class EngineTest(unittest.TestCase):
+
+    def test_long_plan_within_the_recursion_limit(self):
+        (state,tasks) = bench.blocks_problem(400,seed=1)
+        plan = hop.plan(state,tasks,bench.BLOCKS)
+        self.assertGreater(len(plan),sys.getrecursionlimit())
+
+    def test_same_plan_in_every_mode(self):
+        (state,tasks) = bench.blocks_problem(40,seed=2)
+        plan = hop.plan(state,tasks,bench.BLOCKS,copy_on_write=False)
+        self.assertEqual(hop.plan(state,tasks,bench.BLOCKS),plan)
+        self.assertEqual(hop.plan(state,tasks,bench.BLOCKS,in_place=True),
+                         plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
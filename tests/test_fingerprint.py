@@ -0,0 +1,74 @@
+import unittest
+
+from pyhop import hop
+from pyhop.cow import CowDict
+from pyhop.domain import compile_domain
+from pyhop.fingerprint import fingerprint
+from pyhop.trail import Trail, TrailDict
+
+
+class Box(object):
+    """A value with __eq__ but no __hash__."""
+    def __init__(self,val):
+        self.val = val
+
+    def __eq__(self,other):
+        return isinstance(other,Box) and other.val == self.val
+
+def _put(state,key,val):
+    state.d[key] = val
+    return state
+
+def _fill(state):
+    return [('put','x',([1],2)),('put','y',Box(1)),('put','z',3)]
+
+DOMAIN = compile_domain({'put':_put},{'fill':[_fill]})
+PLAN = [('put','x',([1],2)),('put','y',Box(1)),('put','z',3)]
+
+
+class IncrementalFingerprintTest(unittest.TestCase):
+
+    def test_writes_keep_the_fingerprint(self):
+        for d in (CowDict({'a':1,'b':{'c':2}}),
+                  TrailDict({'a':1,'b':{'c':2}},Trail())):
+            d['a'] = 3
+            d['b']['c'] = 4
+            del d['a']
+            self.assertEqual(d.fingerprint(),fingerprint({'b':{'c':4}}))
+
+    def test_unhashable_values_make_it_unknown(self):
+        for d in (CowDict({'a':1,'b':{'c':2}}),
+                  TrailDict({'a':1,'b':{'c':2}},Trail())):
+            d['b']['c'] = ([1],2)
+            with self.assertRaises(TypeError):
+                d.fingerprint()
+            d['b']['c'] = 5
+            self.assertEqual(d.fingerprint(),fingerprint({'a':1,'b':{'c':5}}))
+            d['a'] = 6
+            self.assertEqual(d.fingerprint(),fingerprint({'a':6,'b':{'c':5}}))
+
+    def test_unhashable_initial_values(self):
+        for d in (CowDict({'a':([1],)}),TrailDict({'a':Box(1)},Trail())):
+            d['a'] = 1
+            self.assertEqual(d.fingerprint(),fingerprint({'a':1}))
+
+
+class UnhashablePlanTest(unittest.TestCase):
+
+    def test_operators_may_write_unhashable_values(self):
+        for options in ({},{'in_place':True},{'copy_on_write':False}):
+            state = hop.State('s')
+            state.d = {'a':1}
+            self.assertEqual(hop.plan(state,[('fill',)],DOMAIN,**options),
+                             PLAN)
+
+    def test_initial_state_may_have_unhashable_values(self):
+        for options in ({},{'in_place':True},{'copy_on_write':False}):
+            state = hop.State('s')
+            state.d = {'a':([1],)}
+            self.assertEqual(hop.plan(state,[('fill',)],DOMAIN,**options),
+                             PLAN)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from pyhop import hop
+from pyhop.domain import compile_domain
+from pyhop.stats import SearchStats
+from pyhop.trace import Tracer
+
+
+def _pick(state,n):
+    state.picked = n
+    return state
+
+def _check(state):
+    if state.picked == 3:
+        return state
+    return False
+
+# each offer that _candidates makes, and the state's picked when it makes it
+OFFERS = []
+
+def _candidates(state):
+    for n in range(1,6):
+        OFFERS.append((n,state.picked))
+        yield [('pick',n),('check',)]
+
+def _maybe(state):
+    yield False
+    yield [('pick',3)]
+
+DOMAIN = compile_domain({'pick':_pick,'check':_check},
+                        {'choose':[_candidates],'maybe':[_maybe]})
+
+def _fresh():
+    state = hop.State('s')
+    state.picked = None
+    return state
+
+
+class _Failures(Tracer):
+    def __init__(self):
+        self.events = []
+
+    def method_tried(self,depth,task,method,subtasks):
+        self.events.append(('tried',method.__name__,subtasks))
+
+    def method_failed(self,depth,task,method):
+        self.events.append(('failed',method.__name__))
+
+
+class GeneratorMethodTest(unittest.TestCase):
+
+    def setUp(self):
+        del OFFERS[:]
+
+    def plan(self,**options):
+        return hop.plan(_fresh(),[('choose',)],DOMAIN,**options)
+
+    def test_advanced_only_on_backtracking(self):
+        for options in ({},{'in_place':True},{'copy_on_write':False}):
+            del OFFERS[:]
+            self.assertEqual(self.plan(**options),[('pick',3),('check',)])
+            self.assertEqual([n for (n,_) in OFFERS],[1,2,3])
+
+    def test_state_restored_before_resuming(self):
+        self.plan(in_place=True)
+        self.assertEqual([picked for (_,picked) in OFFERS],
+                         [None,None,None])
+
+    def test_yielded_false_is_a_failed_method(self):
+        tracer = _Failures()
+        self.assertEqual(hop.plan(_fresh(),[('maybe',)],DOMAIN,
+                                  tracer=tracer),[('pick',3)])
+        self.assertEqual(tracer.events,[('failed','_maybe'),
+                                        ('tried','_maybe',[('pick',3)])])
+
+    def test_stats(self):
+        stats = SearchStats()
+        self.assertEqual(self.plan(stats=stats),[('pick',3),('check',)])
+        self.assertEqual(stats.method_calls,{'choose':1,'maybe':0})
+        self.assertIn('_candidates',stats.method_time)
+        self.assertGreater(stats.method_time['_candidates'],0.0)
+        self.assertEqual(stats.operator_applications,6)
+        self.assertEqual(stats.operator_failures,2)
+
+
+if __name__ == '__main__':
+    unittest.main()
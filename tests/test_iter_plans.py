@@ -0,0 +1,41 @@
+import unittest
+
+from pyhop import hop
+from pyhop.domain import compile_domain
+
+
+def _op(state):
+    return state
+
+DOMAIN = compile_domain(
+    {'op':_op},
+    {'t':[lambda state: [], lambda state: [('op',)]],
+     'u':[lambda state: [('op',)], lambda state: [('op',),('op',)]]})
+
+
+class IterPlansTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = hop.State('s')
+
+    def test_all_plans_in_search_order(self):
+        self.assertEqual(list(hop.iter_plans(self.state,[('u',)],DOMAIN)),
+                         [[('op',)],[('op',),('op',)]])
+
+    def test_empty_plan_is_yielded(self):
+        self.assertEqual(list(hop.iter_plans(self.state,[('t',)],DOMAIN)),
+                         [[],[('op',)]])
+        self.assertEqual(list(hop.iter_plans(self.state,[],DOMAIN)),[[]])
+
+    def test_limit(self):
+        self.assertEqual(
+            list(hop.iter_plans(self.state,[('t',),('u',)],DOMAIN,limit=3)),
+            [[('op',)],[('op',),('op',)],[('op',),('op',)]])
+
+    def test_first_plan_is_the_one_plan_returns(self):
+        self.assertEqual(next(hop.iter_plans(self.state,[('t',)],DOMAIN)),
+                         hop.plan(self.state,[('t',)],DOMAIN))
+
+
+if __name__ == '__main__':
+    unittest.main()
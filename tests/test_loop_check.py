@@ -0,0 +1,40 @@
+import unittest
+
+from pyhop import hop
+from pyhop.domain import compile_domain
+
+
+def _done(state):
+    state.done = True
+    return state
+
+def _again(state):
+    return [('go',)]
+
+def _finish(state):
+    return [('done',)]
+
+# the first method of go leads straight back to go in the same state
+LOOPING = compile_domain({'done':_done},{'go':[_again,_finish]})
+
+def _fresh():
+    state = hop.State('s')
+    state.done = False
+    return state
+
+
+class LoopCheckTest(unittest.TestCase):
+
+    def test_without_loop_check_the_search_goes_round(self):
+        self.assertIsInstance(hop.plan(_fresh(),[('go',)],LOOPING,
+                                       max_nodes=1000),hop.BudgetExhausted)
+
+    def test_loop_is_a_dead_end(self):
+        for options in ({},{'in_place':True},{'copy_on_write':False}):
+            self.assertEqual(hop.plan(_fresh(),[('go',)],LOOPING,
+                                      loop_check=True,**options),
+                             [('done',)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from pyhop import hop
+from pyhop.domain import compile_domain
+from pyhop.memo import FailureCache, hash_tasks, task_hash
+
+
+def _goal(name,**variables):
+    goal = hop.Goal(name)
+    for (var,val) in variables.items():
+        setattr(goal,var,val)
+    return goal
+
+def _set(state,val):
+    state.val = val
+    return state
+
+def _reach(state,goal):
+    if goal.val in (1,2):
+        return [('set',goal.val)]
+    return False
+
+DOMAIN = compile_domain({'set':_set},{'reach':[_reach]})
+
+
+class TaskHashTest(unittest.TestCase):
+
+    def test_equal_goals_hash_alike(self):
+        self.assertEqual(task_hash(('t',_goal('g1',pos={'a':1}))),
+                         task_hash(('t',_goal('g2',pos={'a':1}))))
+        self.assertNotEqual(task_hash(('t',_goal('g1',pos={'a':1}))),
+                            task_hash(('t',_goal('g1',pos={'a':2}))))
+
+    def test_unhashable_arguments(self):
+        self.assertEqual(task_hash(('t',[1,2],{'a':{1}})),
+                         task_hash(('t',[1,2],{'a':{1}})))
+
+    def test_memo_keeps_goal_hashes(self):
+        goal = _goal('g',val=1)
+        memo = {}
+        first = hash_tasks([('t',goal)],None,memo)[0]
+        goal.val = 2
+        self.assertEqual(hash_tasks([('t',goal)],None,memo)[0],first)
+        self.assertNotEqual(hash_tasks([('t',goal)])[0],first)
+
+
+class FailureCacheTest(unittest.TestCase):
+
+    def test_cache_outlives_changed_goal(self):
+        state = hop.State('s')
+        state.val = 0
+        goal = _goal('g',val=3)
+        failures = FailureCache()
+        self.assertIs(hop.plan(state,[('reach',goal)],DOMAIN,
+                               failure_cache=failures),False)
+        goal.val = 1
+        self.assertEqual(hop.plan(state,[('reach',goal)],DOMAIN,
+                                  failure_cache=failures),[('set',1)])
+
+    def test_eviction(self):
+        failures = FailureCache(maxsize=2)
+        for key in range(3):
+            failures.add(key)
+        self.assertEqual(len(failures),2)
+        self.assertNotIn(0,failures)
+        self.assertIn(2,failures)
+
+
+if __name__ == '__main__':
+    unittest.main()
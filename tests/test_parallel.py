@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+from pyhop import bench, hop, parallel
+from pyhop.domain import compile_domain
+
+
+def _nap(state,seconds):
+    time.sleep(seconds)
+    return state
+
+NAPS = compile_domain({'nap':_nap},{})
+
+
+class ParallelPlanTest(unittest.TestCase):
+
+    def test_same_plan_as_sequential_search(self):
+        (state,tasks) = bench.travel_problem(30,seed=1)
+        self.assertEqual(hop.plan(state,tasks,bench.TRAVEL,workers=2),
+                         hop.plan(state,tasks,bench.TRAVEL))
+
+    def test_split_covers_the_search_in_order(self):
+        (state,tasks) = bench.travel_problem(30,seed=1)
+        subproblems = parallel.split(state,tasks,bench.TRAVEL,None,4,3)
+        self.assertGreater(len(subproblems),1)
+        plans = [hop.seek_plan(state,tasks,bench.TRAVEL,None,plan,depth)
+                 for (state,tasks,plan,depth) in subproblems]
+        first = next(plan for plan in plans if plan is not False)
+        self.assertEqual(first,hop.plan(state,tasks,bench.TRAVEL))
+
+    def test_options_the_workers_cannot_honour(self):
+        (state,tasks) = bench.travel_problem(10)
+        for options in ({'max_nodes':10},{'max_depth':3},{'time_limit':1},
+                        {'loop_check':True},{'in_place':True}):
+            with self.assertRaises(ValueError):
+                hop.plan(state,tasks,bench.TRAVEL,workers=2,**options)
+
+    def test_hop_imports_parallel_only_when_needed(self):
+        # pyhop.parallel needs concurrent.futures, which Python 2.7 lacks
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.check_call(
+            [sys.executable,'-c','import sys, pyhop.hop; '
+             'assert "pyhop.parallel" not in sys.modules'],cwd=root)
+
+
+class PlanManyTest(unittest.TestCase):
+
+    def test_results_in_order(self):
+        problems = [bench.travel_problem(20,seed=seed) for seed in range(6)]
+        results = list(hop.plan_many(problems,bench.TRAVEL,None,workers=2,
+                                     ordered=True))
+        self.assertEqual([result.index for result in results],list(range(6)))
+        for (result,(state,tasks)) in zip(results,problems):
+            self.assertEqual(result.plan,hop.plan(state,tasks,bench.TRAVEL))
+
+    def test_slow_first_problem_holds_back_reading(self):
+        read = []
+        def problems():
+            for i in range(200):
+                read.append(i)
+                yield (hop.State('s'),[('nap',1.0 if i == 0 else 0.0)])
+        results = hop.plan_many(problems(),NAPS,None,workers=2,ordered=True)
+        self.assertEqual(next(results).index,0)
+        self.assertLessEqual(len(read),2*parallel.QUEUED_PER_WORKER)
+        self.assertEqual(len(list(results)),199)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from pyhop import hop
+from pyhop.domain import compile_domain
+from pyhop.plancache import PlanCache, canonical
+
+
+def _step(state,n):
+    state.n = n
+    return state
+
+def _count(state,n):
+    if state.n >= n:
+        return []
+    return [('step',state.n+1),('count',n)]
+
+DOMAIN = compile_domain({'step':_step},{'count':[_count]})
+
+
+class PlanCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = hop.State('s')
+        self.state.n = 0
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir,'plans.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_hit_returns_a_copy(self):
+        plans = PlanCache()
+        first = hop.plan(self.state,[('count',2)],DOMAIN,plan_cache=plans)
+        first.append('junk')
+        self.assertEqual(
+            hop.plan(self.state,[('count',2)],DOMAIN,plan_cache=plans),
+            [('step',1),('step',2)])
+        self.assertEqual((plans.hits,plans.misses),(1,1))
+
+    def test_verbose_hit_prints_one_line(self):
+        plans = PlanCache()
+        hop.plan(self.state,[('count',1)],DOMAIN,plan_cache=plans)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            hop.plan(self.state,[('count',1)],DOMAIN,plan_cache=plans,
+                     verbose=2)
+        self.assertEqual(out.getvalue(),
+                         "** hop, verbose=2: ** result from cache = "
+                         "[('step', 1)]\n\n")
+
+    def test_options_that_change_the_answer_are_in_the_key(self):
+        plans = PlanCache()
+        hop.plan(self.state,[('count',3)],DOMAIN,plan_cache=plans)
+        result = hop.plan(self.state,[('count',3)],DOMAIN,max_depth=2,
+                          plan_cache=plans)
+        self.assertFalse(result)
+        self.assertEqual(plans.hits,0)
+
+    def test_plans_survive_on_disk_under_the_same_salt(self):
+        plans = PlanCache(path=self.path,salt='1')
+        hop.plan(self.state,[('count',2)],DOMAIN,plan_cache=plans)
+        plans.close()
+        again = PlanCache(path=self.path,salt='1')
+        hop.plan(self.state,[('count',2)],DOMAIN,plan_cache=again)
+        self.assertEqual(again.hits,1)
+        again.close()
+        changed = PlanCache(path=self.path,salt='2')
+        hop.plan(self.state,[('count',2)],DOMAIN,plan_cache=changed)
+        self.assertEqual(changed.hits,0)
+        changed.close()
+
+    def test_use_from_other_threads(self):
+        plans = PlanCache(path=self.path)
+        hop.plan(self.state,[('count',2)],DOMAIN,plan_cache=plans)
+        results = []
+        def work(n):
+            results.append(hop.plan(self.state,[('count',n)],DOMAIN,
+                                    plan_cache=plans))
+        threads = [threading.Thread(target=work,args=(n % 4,))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results),8)
+        self.assertEqual(sorted(len(plan) for plan in results),
+                         [0,0,1,1,2,2,3,3])
+        plans.close()
+
+    def test_canonical_ignores_order(self):
+        self.assertEqual(canonical({'a':1,'b':{2,1}}),
+                         canonical({'b':{1,2},'a':1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
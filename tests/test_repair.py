@@ -0,0 +1,89 @@
+import copy
+import random
+import unittest
+
+from pyhop import bench, hop, repair
+from pyhop.domain import compile_domain
+
+
+def _step(state):
+    state.x += 1
+    return state
+
+def _reach(state,target):
+    if state.x == target:
+        return []
+    if state.x < target:
+        return [('step',),('reach',target)]
+    return False
+
+COUNTER = compile_domain({'step':_step},{'reach':[_reach]})
+
+def _counter(x):
+    state = hop.State('s')
+    state.x = x
+    return state
+
+def _run(state,plan,domain):
+    for action in plan:
+        state = domain.table[action[0]](copy.deepcopy(state),*action[1:])
+        if not state:
+            return False
+    return state
+
+def _disturb(state,rnd):
+    """Move a clear block somewhere else, as if it had been knocked."""
+    clear = [b for b in state.pos if state.clear[b]]
+    b = rnd.choice(clear)
+    d = rnd.choice([c for c in clear if c != b] + ['table'])
+    if state.pos[b] != 'table':
+        state.clear[state.pos[b]] = True
+    state.pos[b] = d
+    if d != 'table':
+        state.clear[d] = False
+
+
+class RepairTest(unittest.TestCase):
+
+    def test_unchanged_state_keeps_the_tree(self):
+        tree = repair.plan_tree(_counter(0),[('reach',3)],COUNTER)
+        self.assertEqual(tree.plan,[('step',)]*3)
+        self.assertIs(tree.repair(1,_counter(1)),tree)
+
+    def test_kept_methods_are_checked_again(self):
+        # after the disturbance every remaining action can still be applied,
+        # but the method no longer asks for all of them
+        tree = repair.plan_tree(_counter(0),[('reach',3)],COUNTER)
+        repaired = tree.repair(1,_counter(2))
+        self.assertEqual(repaired.plan,[('step',)]*2)
+        self.assertEqual(_run(_counter(2),repaired.plan[1:],COUNTER).x,3)
+
+    def test_no_plan_from_the_observed_state(self):
+        tree = repair.plan_tree(_counter(0),[('reach',3)],COUNTER)
+        self.assertIs(tree.repair(1,_counter(5)),False)
+
+    def test_disturbed_blocks_reach_the_goal(self):
+        for seed in range(20):
+            rnd = random.Random(seed)
+            (state,tasks) = bench.blocks_problem(rnd.randint(5,12),seed)
+            goal = tasks[0][1]
+            tree = repair.plan_tree(state,tasks,bench.BLOCKS)
+            # stop after an even number of actions, with the hand empty
+            k = rnd.randint(0,len(tree.plan)//2) * 2
+            observed = _run(state,tree.plan[:k],bench.BLOCKS)
+            _disturb(observed,rnd)
+            repaired = tree.repair(k,observed)
+            self.assertEqual(repaired.plan[:k],tree.plan[:k])
+            final = _run(observed,repaired.plan[k:],bench.BLOCKS)
+            self.assertIsNot(final,False)
+            for b in final.pos:
+                self.assertEqual(final.pos[b],goal.pos.get(b,'table'))
+
+    def test_options_that_cannot_be_kept(self):
+        for options in ({'workers':2},{'plan_cache':{}}):
+            with self.assertRaises(ValueError):
+                repair.plan_tree(_counter(0),[('reach',3)],COUNTER,**options)
+
+
+if __name__ == '__main__':
+    unittest.main()
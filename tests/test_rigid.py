@@ -0,0 +1,37 @@
+import copy
+import pickle
+import unittest
+
+from pyhop import hop
+from pyhop.fingerprint import fingerprint
+from pyhop.rigid import Rigid
+
+
+class RigidTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dist = Rigid({'home':{'park':8},'park':{'home':8}})
+
+    def test_copies_share_it(self):
+        state = hop.State('s')
+        state.dist = self.dist
+        self.assertIs(copy.copy(self.dist),self.dist)
+        self.assertIs(copy.deepcopy(state).dist,self.dist)
+
+    def test_reads_like_a_dict_but_cannot_be_written(self):
+        self.assertEqual(self.dist['home']['park'],8)
+        self.assertEqual(self.dist.get('office','none'),'none')
+        self.assertEqual(self.dist,{'home':{'park':8},'park':{'home':8}})
+        with self.assertRaises(TypeError):
+            self.dist['office'] = {}
+
+    def test_fingerprint_matches_the_dict(self):
+        self.assertEqual(self.dist.fingerprint(),
+                         fingerprint({'home':{'park':8},'park':{'home':8}}))
+
+    def test_pickle(self):
+        self.assertEqual(pickle.loads(pickle.dumps(self.dist)),self.dist)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import copy
+import pickle
+import unittest
+
+from pyhop.schema import state_schema
+from pyhop.trail import Trail, trail_state
+
+
+BlocksState = state_schema('BlocksState',objects=['a','b'],
+                           tables=['pos','clear'],variables=['holding'])
+
+
+class SchemaStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = BlocksState('s')
+        self.state.pos['a'] = 'b'
+        self.state.pos['b'] = 'table'
+        self.state.holding = False
+
+    def test_copies_are_independent(self):
+        new = copy.deepcopy(self.state)
+        new.pos['a'] = 'hand'
+        new.holding = 'a'
+        self.assertEqual(self.state.pos['a'],'b')
+        self.assertEqual(self.state.holding,False)
+        self.assertEqual(new,copy.deepcopy(new))
+        self.assertNotEqual(new,self.state)
+
+    def test_assigning_a_dict_sets_the_table(self):
+        table = self.state.pos
+        self.state.pos = {'a':'table'}
+        self.assertIs(self.state.pos,table)
+        self.assertEqual(dict(self.state.pos),{'a':'table'})
+        self.assertEqual(dict(copy.deepcopy(self.state).pos),{'a':'table'})
+
+    def test_assigning_unknown_objects_or_non_mappings_fails(self):
+        with self.assertRaises(KeyError):
+            self.state.pos = {'z':'table'}
+        with self.assertRaises(TypeError):
+            self.state.pos = 'table'
+        self.assertEqual(self.state.pos['a'],'b')
+
+    def test_trail_undoes_assigned_table(self):
+        trail = Trail()
+        new = trail_state(self.state,trail)
+        mark = trail.mark()
+        new.pos = {'a':'table'}
+        new.holding = 'b'
+        trail.undo(mark)
+        self.assertEqual(dict(new.pos),{'a':'b','b':'table'})
+        self.assertEqual(new.holding,False)
+
+    def test_pickle(self):
+        self.assertEqual(pickle.loads(pickle.dumps(self.state)),self.state)
+
+    def test_print_state_variables(self):
+        self.assertEqual(set(vars(self.state)),
+                         {'__name__','pos','clear','holding'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyhop import hop
+from pyhop.domain import compile_domain
+from pyhop.trace import JSONLinesTracer, PrintTracer, read_trace
+
+
+def _walk(state,x,y):
+    if state.loc == x:
+        state.loc = y
+        return state
+    return False
+
+def _by_taxi(state,x,y):
+    return False
+
+def _by_foot(state,x,y):
+    return [('walk',x,y)]
+
+def _twice(state,x,y,z):
+    return [('travel',x,y),('travel',y,z)]
+
+DOMAIN = compile_domain({'walk':_walk},
+                        {'travel':[_by_taxi,_by_foot],'trip':[_twice]})
+TASKS = [('trip','home','park','shop')]
+PLAN = [('walk','home','park'),('walk','park','shop')]
+
+# what the recursive planner printed for TASKS at each level of verbose
+HEADER = """\
+** hop, verbose={}: **
+   state = s1
+   tasks = [('trip', 'home', 'park', 'shop')]
+"""
+RESULT = """\
+** result = [('walk', 'home', 'park'), ('walk', 'park', 'shop')] 
+
+"""
+NODES = """\
+depth 0 tasks [('trip', 'home', 'park', 'shop')]
+depth 1 tasks [('travel', 'home', 'park'), ('travel', 'park', 'shop')]
+depth 2 tasks [('walk', 'home', 'park'), ('travel', 'park', 'shop')]
+depth 3 tasks [('travel', 'park', 'shop')]
+depth 4 tasks [('walk', 'park', 'shop')]
+depth 5 tasks []
+"""
+DETAILS = """\
+depth 0 tasks [('trip', 'home', 'park', 'shop')]
+depth 0 method instance ('trip', 'home', 'park', 'shop')
+depth 0 new tasks: [('travel', 'home', 'park'), ('travel', 'park', 'shop')]
+depth 1 tasks [('travel', 'home', 'park'), ('travel', 'park', 'shop')]
+depth 1 method instance ('travel', 'home', 'park')
+depth 1 new tasks: False
+depth 1 new tasks: [('walk', 'home', 'park')]
+depth 2 tasks [('walk', 'home', 'park'), ('travel', 'park', 'shop')]
+depth 2 action ('walk', 'home', 'park')
+depth 2 new state:
+    s1.loc = park
+depth 3 tasks [('travel', 'park', 'shop')]
+depth 3 method instance ('travel', 'park', 'shop')
+depth 3 new tasks: False
+depth 3 new tasks: [('walk', 'park', 'shop')]
+depth 4 tasks [('walk', 'park', 'shop')]
+depth 4 action ('walk', 'park', 'shop')
+depth 4 new state:
+    s1.loc = shop
+depth 5 tasks []
+depth 5 returns plan [('walk', 'home', 'park'), ('walk', 'park', 'shop')]
+"""
+OUTPUT = {1:HEADER.format(1)+RESULT,
+          2:HEADER.format(2)+NODES+RESULT,
+          3:HEADER.format(3)+DETAILS+RESULT}
+
+def _state():
+    state = hop.State('s1')
+    state.loc = 'home'
+    return state
+
+def _printed(**options):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        result = hop.plan(_state(),TASKS,DOMAIN,**options)
+    return (result,out.getvalue())
+
+
+class PrintTracerTest(unittest.TestCase):
+
+    def test_verbose_output_is_unchanged(self):
+        for verbose in (1,2,3):
+            self.assertEqual(_printed(verbose=verbose),(PLAN,OUTPUT[verbose]))
+
+    def test_print_tracer_prints_the_same(self):
+        for verbose in (1,2,3):
+            self.assertEqual(_printed(tracer=PrintTracer(verbose)),
+                             (PLAN,OUTPUT[verbose]))
+
+    def test_quiet_by_default(self):
+        self.assertEqual(_printed(),(PLAN,''))
+
+
+class JSONLinesTracerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        out = io.StringIO()
+        tracer = JSONLinesTracer(out,buffer_size=3,states=True)
+        self.assertEqual(hop.plan(_state(),TASKS,DOMAIN,tracer=tracer),PLAN)
+        events = list(read_trace(io.StringIO(out.getvalue())))
+        self.assertEqual(events[0],{'event':'start','state':'s1',
+                                    'tasks':repr(TASKS),
+                                    'variables':{'loc':"'home'"}})
+        self.assertEqual(events[-1],{'event':'finish','result':repr(PLAN)})
+        self.assertIn({'event':'method_failed','depth':1,
+                       'task':repr(('travel','home','park')),
+                       'method':'_by_taxi'},events)
+        applied = [event for event in events
+                   if event['event'] == 'operator_applied']
+        self.assertEqual([event['state'] for event in applied],
+                         [{'loc':"'park'"},{'loc':"'shop'"}])
+
+    def test_file_by_name(self):
+        path = os.path.join(self.dir,'trace.jsonl')
+        with JSONLinesTracer(path) as tracer:
+            hop.plan(_state(),TASKS,DOMAIN,tracer=tracer)
+        events = list(read_trace(path))
+        self.assertEqual([event['event'] for event in events[:3]],
+                         ['start','enter','method_instance'])
+        self.assertEqual(events[-2],{'event':'plan_found','depth':5,
+                                     'plan':repr(PLAN)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+
+from pyhop import hop
+from pyhop.domain import compile_domain
+from pyhop.trail import Trail, TrailDict, trail_state
+
+
+def _reset(state):
+    state.pos = {'a':'table'}
+    return state
+
+def _pickup(state,b):
+    state.pos[b] = 'hand'
+    return state
+
+def _fail(state):
+    return False
+
+def _check(state):
+    if state.pos == {'a':'table'}:
+        return state
+    return False
+
+DOMAIN = compile_domain(
+    {'reset':_reset, 'pickup':_pickup, 'fail':_fail, 'check':_check},
+    {'top':[lambda state: [('reset',),('go',)]],
+     'go':[lambda state: [('pickup','a'),('fail',)],
+           lambda state: [('check',)]]})
+
+def _drop(state,key):
+    del state.pos[key]
+    return state
+
+def _forget(state):
+    del state.pos
+    state.pos = {}
+    return state
+
+def _chosen(state,key):
+    return state
+
+def _first_key(state):
+    return [('chosen',next(iter(state.pos)))]
+
+def _first_variable(state):
+    return [('chosen',next(name for name in vars(state)
+                           if name != '__name__'))]
+
+# each first method changes the order of the state and then fails, and
+# each second one depends on that order
+ORDER = compile_domain(
+    {'drop':_drop, 'forget':_forget, 'fail':_fail, 'chosen':_chosen},
+    {'key':[lambda state: [('drop','a'),('fail',)],_first_key],
+     'variable':[lambda state: [('forget',),('fail',)],_first_variable]})
+
+
+class TrailTest(unittest.TestCase):
+
+    def test_undo_restores_entries_and_variables(self):
+        state = hop.State('s')
+        state.pos = {'a':'table'}
+        state.holding = False
+        trail = Trail()
+        new = trail_state(state,trail)
+        mark = trail.mark()
+        new.pos['a'] = 'hand'
+        new.holding = 'a'
+        del new.pos['a']
+        trail.undo(mark)
+        self.assertEqual(new.pos,{'a':'table'})
+        self.assertEqual(new.holding,False)
+
+    def test_assigned_dict_is_recorded(self):
+        state = hop.State('s')
+        trail = Trail()
+        new = trail_state(state,trail)
+        new.pos = {'a':'table'}
+        self.assertIs(type(new.pos),TrailDict)
+        mark = trail.mark()
+        new.pos['a'] = 'hand'
+        trail.undo(mark)
+        self.assertEqual(new.pos,{'a':'table'})
+
+    def test_in_place_plan_backtracks_over_assigned_dict(self):
+        state = hop.State('s')
+        state.pos = {}
+        for in_place in (False,True):
+            self.assertEqual(
+                hop.plan(state,[('top',)],DOMAIN,in_place=in_place),
+                [('reset',),('check',)])
+        self.assertEqual(state.pos,{})
+
+    def test_undone_deletions_keep_the_order(self):
+        trail = Trail()
+        d = TrailDict({'a':1,'b':2,'c':3},trail)
+        mark = trail.mark()
+        del d['b']
+        d.pop('a')
+        d['b'] = 4
+        trail.undo(mark)
+        self.assertEqual(list(d.items()),[('a',1),('b',2),('c',3)])
+        self.assertEqual(d.fingerprint(),TrailDict(d,Trail()).fingerprint())
+
+    def test_in_place_iterates_in_the_same_order(self):
+        for task in (('key',),('variable',)):
+            state = hop.State('s')
+            state.pos = {'a':1,'b':2}
+            state.holding = False
+            plans = [hop.plan(state,[task],ORDER,**options)
+                     for options in ({},{'copy_on_write':False},
+                                     {'in_place':True})]
+            self.assertEqual(plans[2],plans[0])
+            self.assertEqual(plans[1],plans[0])
+
+
+if __name__ == '__main__':
+    unittest.main()